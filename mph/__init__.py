@@ -2,11 +2,17 @@
 from .meta    import version as __version__
 from .meta    import synopsis as __doc__
 from .session import start
+from .session import submit
+from .session import Proxy
 from .        import config
 from .config  import option
+from .        import aio
 from .client  import Client
 from .server  import Server
+from .server  import Servers
+from .pool    import Pool
 from .model   import Model
 from .node    import Node
+from .node    import Snapshot
 from .node    import tree
 from .node    import inspect
@@ -0,0 +1,102 @@
+﻿"""Awaitable versions of long-running operations for use with asyncio."""
+
+########################################
+# Components                           #
+########################################
+from . import session                  # local Comsol session
+from .client import Client             # client class
+from .model import Model               # model class
+
+########################################
+# Dependencies                         #
+########################################
+import asyncio                         # asynchronous I/O
+from logging import getLogger          # event logging
+
+########################################
+# Globals                              #
+########################################
+log = getLogger(__package__)           # event log
+
+
+########################################
+# Calls                                #
+########################################
+
+async def call(function, *args, timeout=None, **kwargs):
+    """
+    Calls a function on the Comsol thread and awaits the result.
+
+    The `function` is called with the given positional and keyword
+    arguments by the dedicated Comsol thread. The session therefore
+    has to be started with the configuration option `'executor'`
+    turned on, see [`start()`](#start). Otherwise `RuntimeError` is
+    raised.
+
+    If the call does not return within `timeout` seconds, it is
+    cancelled and `asyncio.TimeoutError` is raised. Calls can also be
+    cancelled like any other task. A call that is still waiting in
+    the queue will then not run at all. A call already running cannot
+    be interrupted, as the Comsol API provides no means to do so. It
+    then finishes in the background, but its result is discarded.
+
+    Example usage:
+    ```python
+    import mph
+    import asyncio
+
+    async def main():
+        mph.option('executor', True)
+        client = mph.start()
+        model = await mph.aio.load(client, 'model.mph')
+        await mph.aio.solve(model, timeout=600)
+        await mph.aio.save(model)
+
+    asyncio.run(main())
+    ```
+    """
+    future = asyncio.wrap_future(submit(function, args, kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        name = getattr(function, '__name__', function)
+        log.error(f'Call to {name}() timed out.')
+        raise
+
+
+def submit(function, args, kwargs):
+    """Submits the function call to the Comsol thread."""
+    if not session.executor:
+        error = 'No dedicated Comsol thread has been started.'
+        log.error(error)
+        raise RuntimeError(error)
+    return session.executor.submit(session.run, function, args, kwargs)
+
+
+########################################
+# Operations                           #
+########################################
+
+async def load(client, file, timeout=None):
+    """Loads a model from the given `file`. Awaits `Client.load()`."""
+    return await call(Client.load, client, file, timeout=timeout)
+
+
+async def mesh(model, mesh=None, force=False, timeout=None):
+    """Runs the mesh sequence(s). Awaits `Model.mesh()`."""
+    return await call(Model.mesh, model, mesh, force, timeout=timeout)
+
+
+async def solve(model, study=None, force=False, timeout=None):
+    """Solves the study, or all studies. Awaits `Model.solve()`."""
+    return await call(Model.solve, model, study, force, timeout=timeout)
+
+
+async def save(model, path=None, format=None, timeout=None):
+    """Saves the model at the given `path`. Awaits `Model.save()`."""
+    return await call(Model.save, model, path, format, timeout=timeout)
+
+
+async def export(model, node=None, file=None, timeout=None):
+    """Runs the export node(s). Awaits `Model.export()`."""
+    return await call(Model.export, model, node, file, timeout=timeout)
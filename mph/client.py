@@ -390,6 +390,7 @@ class Client:
         name = model.name()
         tag  = model.java.tag()
         log.debug(f'Removing model "{name}" with tag "{tag}".')
+        model.pool.clear()
         self.java.remove(tag)
 
     def clear(self):
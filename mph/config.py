@@ -16,9 +16,14 @@ system = platform.system()             # operating system
 log    = getLogger(__package__)        # event log
 
 options = {
-    'session':  'platform-dependent',
-    'caching':  False,
-    'classkit': False,
+    'session':    'platform-dependent',
+    'caching':    False,
+    'classkit':   False,
+    'nodecache':  True,
+    'propcache':  False,
+    'evalcache':  0,
+    'solvecache': False,
+    'executor':   False,
 }
 """Default values for configuration options."""
 
@@ -16,17 +16,32 @@ or `which comsol` (on Linux and macOS) to find a Comsol installation
 that isn't in a default location, but for which the Comsol executable
 was added to the executable search path.
 
+Querying an installation for its version number means starting the
+Comsol executable, which takes a few seconds. The version information
+is therefore cached in a file next to the configuration file, see
+`config.location()`, and reused in later Python sessions as long as
+the modification times of the executable, its Java VM configuration,
+and the Java API folder remain unchanged.
+
 Note that duplicate installations will be ignored. That is, a Comsol
 installation found in a later step that reports the same version as one
 found in an earlier step will be ignored, regardless of install location.
 """
 
+########################################
+# Components                           #
+########################################
+from .config import location           # configuration folder
+
 ########################################
 # Dependencies                         #
 ########################################
 import platform                        # platform information
 import subprocess                      # external processes
 import re                              # regular expressions
+import json                            # JSON files
+import os                              # operating system
+from tempfile import mkstemp           # temporary file
 from pathlib import Path               # file paths
 from functools import lru_cache        # function cache
 from logging import getLogger          # event logging
@@ -87,6 +102,90 @@ def parse(version):
     return (name, major, minor, patch, build)
 
 
+########################################
+# Version cache                        #
+########################################
+
+def cache_file():
+    """Returns the file that caches version information across sessions."""
+    return location()/'backends.json'
+
+
+def load_versions():
+    """Loads cached version information, indexed by executable."""
+    file = cache_file()
+    try:
+        with file.open(encoding='UTF-8') as stream:
+            versions = json.load(stream)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as error:
+        log.debug(f'Ignoring unreadable version cache "{file}": {error}')
+        return {}
+    if not isinstance(versions, dict):
+        log.debug(f'Ignoring version cache "{file}" of unexpected format.')
+        return {}
+    return versions
+
+
+def save_versions(versions):
+    """
+    Saves version information to the cache file.
+
+    The file is written under a temporary name first and then renamed,
+    so that processes starting at the same time never read a partially
+    written file.
+    """
+    file = cache_file()
+    log.debug(f'Saving version information in "{file}".')
+    temporary = None
+    try:
+        file.parent.mkdir(parents=True, exist_ok=True)
+        (handle, temporary) = mkstemp(dir=file.parent, prefix=file.name,
+                                      suffix='.tmp')
+        with os.fdopen(handle, 'w', encoding='UTF-8') as stream:
+            json.dump(versions, stream, indent=2)
+        os.replace(temporary, file)
+    except OSError as error:
+        log.debug(f'Could not write version cache: {error}')
+        if temporary:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
+
+def stamp(paths):
+    """Returns the modification times of the given files or folders."""
+    try:
+        return [Path(path).stat().st_mtime_ns for path in paths]
+    except OSError:
+        return None
+
+
+def query_version(server):
+    """Returns version information reported by the server executable."""
+    command = server + ['--version']
+    command[0] = str(command[0])   # Needed to support Python 3.6 and 3.7.
+    try:
+        arguments = dict(
+            check=True, timeout=15,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True, encoding='ascii', errors='ignore',
+        )
+        # `universal_newlines` instead of `text` to support Python 3.6.
+        if system == 'Windows':
+            arguments['creationflags'] = 0x08000000
+        process = subprocess.run(command, **arguments)
+    except subprocess.CalledProcessError:
+        log.debug('Querying version information failed.')
+        return
+    except subprocess.TimeoutExpired:
+        log.debug('Querying version information timed out.')
+        return
+    return process.stdout.strip()
+
+
 ########################################
 # Back-end discovery                   #
 ########################################
@@ -248,6 +347,8 @@ def find_backends():
 
     log.debug('Searching system for available Comsol back-ends.')
     backends = []
+    versions = load_versions()
+    updated  = False
 
     # Search system for Comsol executables.
     if system == 'Windows':
@@ -344,27 +445,22 @@ def find_backends():
             log.debug('Did not find Comsol Java API plug-ins in root folder.')
             continue
 
-        # Get version information from Comsol server.
-        command = server + ['--version']
-        command[0] = str(command[0])   # Needed to support Python 3.6 and 3.7.
-        try:
-            arguments = dict(
-                check=True, timeout=15,
-                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
-                universal_newlines=True, encoding='ascii', errors='ignore',
-            )
-            # `universal_newlines` instead of `text` to support Python 3.6.
-            if system == 'Windows':
-                arguments['creationflags'] = 0x08000000
-            process = subprocess.run(command, **arguments)
-        except subprocess.CalledProcessError:
-            log.debug('Querying version information failed.')
-            continue
-        except subprocess.TimeoutExpired:
-            log.debug('Querying version information timed out.')
-            continue
-        version = process.stdout.strip()
-        log.debug(f'Reported version information is "{version}".')
+        # Get version information from Comsol server, unless cached.
+        key = str(server[0])
+        signature = stamp([server[0], ini, api])
+        cached = versions.get(key)
+        if (signature and isinstance(cached, dict)
+                and cached.get('stamp') == signature):
+            version = cached.get('version', '')
+            log.debug(f'Cached version information is "{version}".')
+        else:
+            version = query_version(server)
+            if version is None:
+                continue
+            log.debug(f'Reported version information is "{version}".')
+            if signature:
+                versions[key] = {'stamp': signature, 'version': version}
+                updated = True
 
         # Parse version information.
         try:
@@ -392,6 +488,10 @@ def find_backends():
             'server': server,
         })
 
+    # Remember version information for future sessions.
+    if updated:
+        save_versions(versions)
+
     # Return list with information about all installed Comsol back-ends.
     return backends
 
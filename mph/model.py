@@ -4,14 +4,22 @@
 # Components                           #
 ########################################
 from .node import Node                 # model node
+from .node import matrix               # Java matrix conversion
+from .config import option             # configuration
 
 ########################################
 # Dependencies                         #
 ########################################
 from numpy import array, ndarray       # numerical array
+from numpy import zeros                # array initialization
 from numpy import integer              # NumPy integer
+from numpy.lib.format import open_memmap  # memory-mapped array file
+from collections import OrderedDict    # ordered dictionary
+from itertools import product          # Cartesian product
+from copy import deepcopy              # deep copy
 from pathlib import Path               # file-system path
 from re import match                   # pattern matching
+from re import findall                 # pattern search
 from warnings import warn              # user warning
 from logging import getLogger          # event logging
 
@@ -138,10 +146,44 @@ class Model:
     def __init__(self, parent):
         if isinstance(parent, Model):
             java = parent.java
+            resolved = parent.resolved
+            values = parent.values
+            pool = parent.pool
+            sources = parent.sources
+            results = parent.results
+            state = parent.state
+            solved = parent.solved
+            sequences = parent.sequences
         else:
             java = parent
+            resolved = {}
+            values = {}
+            pool = {}
+            sources = {}
+            results = OrderedDict()
+            state = {'version': 0, 'inputs': 0, 'hits': 0, 'misses': 0,
+                     'geometries': 0, 'meshes': 0, 'physics': 0,
+                     'selections': 0, 'functions': 0, 'builds': 0}
+            solved = {}
+            sequences = {}
         self.java = java
         """Java object that this instance is wrapped around."""
+        self.resolved = resolved
+        """Java objects of previously resolved nodes, indexed by node path."""
+        self.values = values
+        """Cached property values of nodes, indexed by node path."""
+        self.pool = pool
+        """Evaluation features kept for reuse, indexed by feature type."""
+        self.sources = sources
+        """Solutions that datasets refer to, indexed by dataset path."""
+        self.results = results
+        """Cached evaluation results, least recently used first."""
+        self.state = state
+        """Version number of the model state and evaluation cache tallies."""
+        self.solved = solved
+        """Model-state input counts at which studies were solved."""
+        self.sequences = sequences
+        """States of geometry and mesh sequences when they were last run."""
 
     def __str__(self):
         return self.name()
@@ -258,12 +300,34 @@ class Model:
         """
         return (self/None).problems()
 
+    def snapshot(self, properties=False):
+        """
+        Captures the current state of the entire model tree.
+
+        Returns a [`Snapshot`](#Snapshot) recording name, tag, feature
+        type, and activation state of all nodes in the model, as well
+        as their properties if `properties` is `True`. See
+        [`Node.snapshot()`](#Node.snapshot) for details.
+        """
+        return (self/None).snapshot(properties)
+
     ####################################
     # Solving                          #
     ####################################
 
-    def build(self, geometry=None):
-        """Builds the named geometry, or all of them if none given."""
+    def build(self, geometry=None, force=False):
+        """
+        Builds the named geometry, or all of them if none given.
+
+        Geometry sequences are not built again if neither their nodes,
+        nor selections, nor the parameters they depend on have changed
+        since the last build. To that end, the properties of the
+        geometry nodes are scanned for parameter names, once, and again
+        after the nodes were edited. Solving a study, which may rebuild
+        the geometry, counts as a change. Changes made via the Java
+        layer go unnoticed, and sequences whose properties cannot be
+        scanned are always built. Pass `force=True` to build anyway.
+        """
         geometries = self/'geometries'
         if geometry is None:
             if not geometries.children():
@@ -287,12 +351,24 @@ class Model:
             raise LookupError(error)
         nodes = [geometry] if geometry else geometries.children()
         for node in nodes:
+            if not force and self.sequence_current(node):
+                log.info(f'Geometry sequence "{node.name()}" is up to date. '
+                         'Skipping it.')
+                continue
             log.info(f'Running geometry sequence "{node.name()}".')
-            node.run()
+            self.sequence_run(node)
             log.info('Finished geometry sequence.')
 
-    def mesh(self, mesh=None):
-        """Runs the named mesh sequence, or all of them if none given."""
+    def mesh(self, mesh=None, force=False):
+        """
+        Runs the named mesh sequence, or all of them if none given.
+
+        Mesh sequences are not run again if neither their nodes, nor
+        the geometry, nor physics settings or selections, nor the
+        parameters they depend on have changed since the last run, just
+        like with [`build()`](#Model.build). Changes made via the Java
+        layer go unnoticed. Pass `force=True` to mesh anyway.
+        """
         meshes = self/'meshes'
         if mesh is None:
             if not meshes.children():
@@ -316,12 +392,25 @@ class Model:
             raise LookupError(error)
         nodes = [mesh] if mesh else meshes.children()
         for node in nodes:
+            if not force and self.sequence_current(node):
+                log.info(f'Mesh sequence "{node.name()}" is up to date. '
+                         'Skipping it.')
+                continue
             log.info(f'Running mesh sequence "{node.name()}".')
-            node.run()
+            self.sequence_run(node)
             log.info('Finished mesh sequence.')
 
-    def solve(self, study=None):
-        """Solves the named study, or all of them if none given."""
+    def solve(self, study=None, force=False):
+        """
+        Solves the named study, or all of them if none given.
+
+        If the configuration option `'solvecache'` is set to `True`,
+        studies that were already solved are skipped if the model has
+        not been modified since, i.e. if no parameters, properties, or
+        imported data have changed and no nodes were created, removed,
+        or toggled via this library. Changes made via the Java layer
+        go unnoticed. Pass `force=True` to solve the studies anyway.
+        """
         studies = self/'studies'
         if study is None:
             if not studies.children():
@@ -344,11 +433,142 @@ class Model:
             log.error(error)
             raise LookupError(error)
         nodes = [study] if study else studies.children()
+        skip = option('solvecache') and not force
         for node in nodes:
+            inputs = self.state['inputs']
+            if skip and self.solved.get(node.path) == inputs:
+                log.info(f'Study "{node.name()}" is up to date. Skipping it.')
+                continue
             log.info(f'Running study "{node.name()}".')
             node.run()
+            self.solved[node.path] = inputs
+            self.sequences.clear()
             log.info('Finished solving study.')
 
+    def sweep(self, grid, study=None, expressions=None, units=None,
+                    dataset=None, native=True):
+        """
+        Solves the model for a grid of parameter values.
+
+        `grid` is a dictionary indexed by parameter names, mapping to
+        the sequence of values each parameter is to take. The model is
+        solved for all combinations of those values, where the values
+        of the last parameter vary the fastest. The global `expressions`,
+        a sequence of strings, are evaluated for each combination, in
+        the given `units`, if any, just like with
+        [`evaluate()`](#Model.evaluate).
+
+        The results are returned as a [structured array][1], holding
+        one record per combination, with fields named after the
+        parameters and the expressions. For example, `results['d']`
+        are the values of parameter `d`, and `results['2*es.intWe/U^2']`
+        the values of that expression.
+
+        If a `study` is given, a native parametric sweep is added to it
+        temporarily, so that all combinations are solved in one run,
+        which is much faster than solving them one by one. The sweep,
+        as well as the solutions, datasets, and plots it created, are
+        removed again afterwards. If that is not possible, for example
+        if the study's solver configuration does not support it, or if
+        `native` is `False`, the parameters are set in turn and the
+        study solved each time. The expressions are then evaluated on
+        the given `dataset`, or the default one. As the native sweep
+        creates a dataset of its own, giving a `dataset` means that the
+        combinations are always solved one by one.
+
+        The parameters are reset to their original values afterwards.
+        The study's solution, however, is then that of the last
+        combination solved, not that of the original parameter values.
+        The next call to [`solve()`](#Model.solve) solves the study
+        again, as it is no longer considered up to date.
+
+        [1]: https://numpy.org/doc/stable/user/basics.rec.html
+        """
+        # Validate arguments.
+        if not isinstance(grid, dict) or not grid:
+            error = 'Argument "grid" must be a dictionary of parameter values.'
+            log.error(error)
+            raise TypeError(error)
+        if isinstance(study, str):
+            study = self/'studies'/study
+        if study is not None and not study.exists():
+            error = f'Study "{study.name()}" does not exist.'
+            log.error(error)
+            raise LookupError(error)
+        expressions = list(expressions or [])
+        if units is None:
+            units = [None] * len(expressions)
+        if len(units) != len(expressions):
+            error = 'Number of units does not match number of expressions.'
+            log.error(error)
+            raise ValueError(error)
+        duplicates = sorted({expression for expression in expressions
+                             if expressions.count(expression) > 1})
+        if duplicates:
+            error = f'Expressions {duplicates} are requested more than once.'
+            log.error(error)
+            raise ValueError(error)
+        names = list(grid)
+        defined = self.parameters()
+        unknown = [name for name in names if name not in defined]
+        if unknown:
+            error = f'Grid refers to undefined parameters {unknown}.'
+            log.error(error)
+            raise LookupError(error)
+        clashes = [name for name in names if name in expressions]
+        if clashes:
+            error = f'Parameters {clashes} are also requested expressions.'
+            log.error(error)
+            raise ValueError(error)
+        points = list(product(*(grid[name] for name in names)))
+        log.info(f'Sweeping {len(points)} combinations of {names}.')
+
+        # Try native parametric sweep.
+        results = None
+        if native and study is not None and dataset is None:
+            try:
+                results = self.sweep_native(study, names, points,
+                                            expressions, units)
+            except Exception as error:
+                log.warning(f'Native parametric sweep failed ({error}). '
+                            'Solving one by one instead.')
+
+        # Otherwise solve for each combination in turn.
+        if results is None:
+            original = {name: self.parameter(name) for name in names}
+            results = []
+            try:
+                for point in points:
+                    self.parameters(dict(zip(names, point)))
+                    self.solve(study)
+                    results.append([self.evaluate(expression, unit, dataset)
+                                    for (expression, unit)
+                                    in zip(expressions, units)])
+            finally:
+                self.parameters(original)
+        if study is None:
+            self.solved.clear()
+        else:
+            self.solved.pop(study.path, None)
+        self.sequences.clear()
+        log.info('Finished sweep.')
+
+        # Tabulate results.
+        fields = []
+        columns = []
+        for (i, name) in enumerate(names):
+            column = array([point[i] for point in points])
+            fields.append((name, column.dtype))
+            columns.append(column)
+        for (j, expression) in enumerate(expressions):
+            column = array([result[j] for result in results])
+            fields.append((expression, column.dtype, column.shape[1:]))
+            columns.append(column)
+        table = zeros(len(points), dtype=fields)
+        for (field, column) in zip(fields, columns):
+            table[field[0]] = column
+        return table
+
     ####################################
     # Evaluation                       #
     ####################################
@@ -362,31 +582,9 @@ class Model:
         array and a floating-point array. A `dataset` name may be
         specified. Otherwise the default dataset is used.
         """
-        # Validate dataset argument.
-        if dataset is not None:
-            if isinstance(dataset, str):
-                dataset = self/'datasets'/dataset
-            if not isinstance(dataset, Node):
-                error = 'Dataset must be a dataset name or dataset node.'
-                log.error(error)
-                raise TypeError(error)
-        if not dataset.exists():
-            error = f'Dataset "{dataset.name()}" does not exist.'
-            log.error(error)
-            raise ValueError(error)
-
-        # Find corresponding solution.
-        if 'solution' in dataset.properties():
-            tag = dataset.property('solution')
-        elif 'data' in dataset.properties():
-            tag = dataset.property('data')
-        for solution in self/'solutions':
-            if solution.tag() == tag:
-                break
-        else:
-            error = f'Dataset "{dataset.name()}" does not refer to a solution.'
-            log.error(error)
-            raise RuntimeError(error)
+        # Validate dataset argument and find corresponding solution.
+        dataset  = self.evaluation_dataset(dataset, None, None)
+        solution = self.dataset_solution(dataset)
 
         # Get indices from solution info and values from solution itself.
         java    = solution.java
@@ -395,7 +593,7 @@ class Model:
         values  = array(java.getPVals())
         return (indices, values)
 
-    def outer(self, dataset=None):
+    def outer(self, dataset=None, names=False):
         """
         Returns the indices and values of outer solutions.
 
@@ -403,38 +601,27 @@ class Model:
         returned as a tuple of an integer array and a floating-point
         array. A `dataset` name may be specified. Otherwise the default
         dataset is used.
-        """
-        # Validate dataset argument.
-        if dataset is not None:
-            if isinstance(dataset, str):
-                dataset = self/'datasets'/dataset
-            if not isinstance(dataset, Node):
-                error = 'Dataset must be a dataset name or dataset node.'
-                log.error(error)
-                raise TypeError(error)
-        if not dataset.exists():
-            error = f'Dataset "{dataset.name()}" does not exist.'
-            log.error(error)
-            raise ValueError(error)
 
-        # Find corresponding solution.
-        if 'solution' in dataset.properties():
-            tag = dataset.property('solution')
-        elif 'data' in dataset.properties():
-            tag = dataset.property('data')
-        for solution in self/'solutions':
-            if solution.tag() == tag:
-                break
-        else:
-            error = f'Dataset "{dataset.name()}" does not refer to a solution.'
-            log.error(error)
-            raise RuntimeError(error)
+        If `names` is `True`, a triple is returned instead: the integer
+        array of indices, a two-dimensional floating-point array with
+        one row per outer solution and one column per swept parameter,
+        and the list of parameter names corresponding to those columns.
+        """
+        # Validate dataset argument and find corresponding solution.
+        dataset  = self.evaluation_dataset(dataset, None, None)
+        solution = self.dataset_solution(dataset)
 
-        # Get indices and values from solution info.
-        info = solution.java.getSolutioninfo()
+        # Get indices and values from solution info, all in one go.
+        info    = solution.java.getSolutioninfo()
         indices = array(info.getOuterSolnum())
-        values = array([info.getPvals([[index,1]])[0][0] for index in indices])
-        return (indices, values)
+        if len(indices):
+            solnums = [[int(index), 1] for index in indices]
+            table   = matrix(info.getPvals(solnums))
+        else:
+            table = array([]).reshape(0, 0)
+        if names:
+            return (indices, table, [str(name) for name in info.getPNames()])
+        return (indices, table[:, 0] if table.size else array([]))
 
     def evaluate(self, expression, unit=None, dataset=None,
                        inner=None, outer=None):
@@ -467,10 +654,491 @@ class Model:
         variables in time-dependent parameter sweeps, where not all
         time steps are returned: see issues [#120] and [#119].
 
+        The evaluation features this method adds to the model (under
+        `evaluations` in the model tree) are kept and reused in later
+        calls, which is considerably faster than creating them anew each
+        time. They are removed when the model is [saved](#Model.save).
+
+        If the configuration option `'evalcache'` is set to a positive
+        number, up to that many results are cached and returned again
+        when the same evaluation is requested later on, as long as the
+        model has not been modified in the meantime, i.e. by changing
+        parameters or properties, by solving, meshing, or building, or
+        by importing data. The option is `0`, i.e. off, by default. See
+        [`cache_info()`](#Model.cache_info) for statistics.
+
         [#119]: https://github.com/MPh-py/MPh/issues/119
         [#120]: https://github.com/MPh-py/MPh/issues/120
         """
-        # Validate input arguments.
+        # Return cached results if available.
+        size = option('evalcache')
+        key  = None
+        if size:
+            key = self.evaluation_key(expression, unit, dataset, inner, outer)
+        if key is not None:
+            if key in self.results:
+                self.results.move_to_end(key)
+                self.state['hits'] += 1
+                log.info(f'Returning cached results for "{expression}".')
+                return deepcopy(self.results[key])
+            self.state['misses'] += 1
+
+        # Evaluate and cache the results.
+        results = self.evaluate_uncached(expression, unit, dataset,
+                                         inner, outer)
+        if key is not None:
+            self.results[key] = deepcopy(results)
+            while len(self.results) > size:
+                self.results.popitem(last=False)
+        return results
+
+    def cache_info(self):
+        """
+        Returns statistics of the evaluation cache.
+
+        The statistics are returned as a dictionary with the number of
+        `hits` and `misses` of [`evaluate()`](#Model.evaluate) calls
+        since the model was loaded, the current number of cached
+        results (`size`), the maximum number (`maxsize`) as set by the
+        configuration option `'evalcache'`, and the `version` number of
+        the model state, which increases each time the model is modified.
+        """
+        return {
+            'hits':    self.state['hits'],
+            'misses':  self.state['misses'],
+            'size':    len(self.results),
+            'maxsize': option('evalcache'),
+            'version': self.state['version'],
+        }
+
+    def evaluate_uncached(self, expression, unit, dataset, inner, outer):
+        # Evaluates the expression without consulting the cache.
+        #
+        # Called by `evaluate()`, which documents the arguments.
+
+        # Validate input arguments and find dataset and solution.
+        dataset = self.evaluation_dataset(dataset, inner, outer)
+        log.info(f'Evaluating "{expression}" on dataset "{dataset.name()}".')
+        self.evaluation_solution(dataset)
+
+        # Try to perform a global evaluation, which may fail.
+        try:
+            log.debug('Trying global evaluation.')
+            results = self.evaluate_global(expression, unit, dataset,
+                                           inner, outer)
+            log.info('Finished global evaluation.')
+            return results.squeeze()
+        # Move on if this fails. Seems to not be a global expression then.
+        except Exception:
+            log.debug('Global evaluation failed. Moving on.')
+
+        # For particle datasets, use an "EvalPoint" feature. Otherwise
+        # use an "Eval" feature.
+        particle = (dataset.type() == 'Particle')
+        (eval, defaults) = self.evaluation_feature(
+            'EvalPoint' if particle else 'Eval')
+
+        # Set up the evaluation feature. Inner solutions are selected
+        # right there, so that only their data is retrieved.
+        eval.property('expr', expression)
+        if unit:
+            eval.property('unit', unit)
+        eval.property('data', dataset)
+        if outer is not None:
+            eval.property('outersolnum', outer)
+        if isinstance(inner, str):
+            eval.property('innerinput', inner)
+        elif inner is not None:
+            eval.property('innerinput', 'manual')
+            eval.property('solnum', [int(index) for index in inner])
+
+        # Retrieve the data.
+        log.info('Retrieving data.')
+        results = self.evaluation_data(eval, expression, particle)
+        log.info('Finished retrieving data.')
+
+        # Squeeze out singleton array dimensions.
+        if isinstance(expression, (list, tuple)):
+            results = [result.squeeze() for result in results]
+        else:
+            results = results.squeeze()
+
+        # Return array of results.
+        return results
+
+    def evaluate_steps(self, expression, unit=None, dataset=None,
+                             inner=None, outer=None, chunk=1):
+        """
+        Evaluates a field expression one inner solution at a time.
+
+        Returns a generator that yields the results for one inner
+        solution after the other, i.e. time step by time step in
+        time-dependent studies, so that the full space-time data never
+        has to be held in memory. Each item is a tuple of the solution
+        indices and the results for them. Setting `chunk` to a number
+        larger than one yields that many solutions at once, which
+        reduces the overhead of communicating with the Comsol server.
+
+        The arguments are the same as for [`evaluate()`](#Model.evaluate).
+        If `inner` is not specified, all inner solutions are stepped
+        through. Only the data for the current step (or chunk of steps)
+        is retrieved from the server.
+        """
+        (dataset, indices) = self.evaluation_indices(dataset, inner,
+                                                     outer, chunk)
+        log.info(f'Evaluating "{expression}" on dataset "{dataset.name()}" '
+                 'step by step.')
+        for (selection, results) in self.evaluation_chunks(
+                expression, unit, dataset, indices, outer, chunk):
+            if isinstance(expression, (list, tuple)):
+                results = [result.squeeze() for result in results]
+            else:
+                results = results.squeeze()
+            yield (selection, results)
+        log.info('Finished retrieving data.')
+
+    def evaluate_file(self, expression, file, unit=None, dataset=None,
+                            inner=None, outer=None, chunk=1):
+        """
+        Evaluates a field expression and writes the results to a file.
+
+        The results are retrieved one inner solution, or one `chunk` of
+        inner solutions, at a time, just like with
+        [`evaluate_steps()`](#Model.evaluate_steps), and are written to
+        a NumPy `.npy` file right away, so that they never have to fit
+        into memory as a whole. The file is then returned as a
+        [memory-mapped array][1], with the inner solutions along the
+        first axis and the mesh points along the second.
+
+        If `expression` is a sequence of expressions, `file` has to
+        be a sequence of as many file paths, one file per expression,
+        and a list of arrays is returned. The other arguments are the
+        same as for [`evaluate()`](#Model.evaluate). Particle datasets
+        are not supported.
+
+        [1]: https://numpy.org/doc/stable/reference/generated/\
+numpy.memmap.html
+        """
+        if isinstance(expression, (list, tuple)):
+            expressions = expression
+            files = file
+        else:
+            expressions = [expression]
+            files = [file]
+        if (not isinstance(files, (list, tuple))
+                or len(files) != len(expressions)):
+            error = 'Argument "file" must give one file per expression.'
+            log.error(error)
+            raise ValueError(error)
+        (dataset, indices) = self.evaluation_indices(dataset, inner,
+                                                     outer, chunk)
+        if dataset.type() == 'Particle':
+            error = 'Particle datasets cannot be evaluated to a file.'
+            log.error(error)
+            raise NotImplementedError(error)
+        if not len(indices):
+            error = 'There are no inner solutions to evaluate.'
+            log.error(error)
+            raise ValueError(error)
+        log.info(f'Evaluating "{expression}" on dataset "{dataset.name()}" '
+                 'into file.')
+        arrays = []
+        start = 0
+        for (selection, results) in self.evaluation_chunks(
+                expression, unit, dataset, indices, outer, chunk):
+            if not arrays:
+                shape = (len(indices),) + results.shape[2:]
+                arrays = [open_memmap(str(file), mode='w+',
+                                      dtype=results.dtype, shape=shape)
+                          for file in files]
+            for (target, result) in zip(arrays, results):
+                target[start:start+len(selection)] = result
+            start += len(selection)
+        for target in arrays:
+            target.flush()
+        log.info('Finished writing data.')
+        if isinstance(expression, (list, tuple)):
+            return arrays
+        return arrays[0]
+
+    def evaluate_batch(self, requests):
+        """
+        Evaluates a batch of expressions and returns the results.
+
+        `requests` is a list of evaluation requests. Each request is
+        either an expression (string) or a tuple of the arguments that
+        [`evaluate()`](#Model.evaluate) accepts, namely `(expression,
+        unit, dataset, inner, outer)`, where trailing items may be left
+        out. The results are returned as a dictionary indexed by the
+        expressions. Alternatively, `requests` may be a dictionary, in
+        which case the results are indexed by the same keys. Use the
+        latter to evaluate the same expression more than once, say with
+        different units or datasets. A list that contains an expression
+        twice raises `ValueError`.
+
+        Requests that refer to the same dataset as well as inner and
+        outer solutions are grouped and, if possible, evaluated all at
+        once as global expressions. This is much faster than evaluating
+        each expression separately. If global evaluation of a group
+        fails, for example because it contains field expressions, its
+        requests are evaluated one by one, just like `evaluate()` would.
+        """
+        if isinstance(requests, dict):
+            requests = list(requests.items())
+        else:
+            requests = [(None, request) for request in requests]
+
+        # Group the requests.
+        keys = []
+        groups = {}
+        default = None
+        for (key, request) in requests:
+            if isinstance(request, str):
+                request = (request,)
+            if not 1 <= len(request) <= 5:
+                error = f'Evaluation request {request!r} is malformed.'
+                log.error(error)
+                raise ValueError(error)
+            (expression, unit, dataset, inner, outer) = \
+                tuple(request) + (None,) * (5 - len(request))
+            if key is None:
+                key = expression
+            if key in keys:
+                error = (f'Expression "{key}" requested more than once. '
+                         'Pass the requests as a dictionary instead.')
+                log.error(error)
+                raise ValueError(error)
+            keys.append(key)
+            if dataset is None:
+                if default is None:
+                    default = self.evaluation_dataset(None, inner, outer)
+                dataset = default
+            dataset = self.evaluation_dataset(dataset, inner, outer)
+            if isinstance(inner, (list, ndarray)):
+                inner = tuple(int(index) for index in inner)
+            group = (dataset.path, inner, outer, unit is None)
+            if group not in groups:
+                groups[group] = (dataset, [])
+            groups[group][1].append((key, expression, unit))
+
+        # Evaluate each group.
+        results = {}
+        for (group, (dataset, items)) in groups.items():
+            (path, inner, outer, no_unit) = group
+            if isinstance(inner, tuple):
+                inner = list(inner)
+            (names, expressions, units) = zip(*items)
+            log.info(f'Evaluating {len(names)} expressions '
+                     f'on dataset "{dataset.name()}".')
+            self.evaluation_solution(dataset)
+            try:
+                log.debug('Trying global evaluation.')
+                values = self.evaluate_global(list(expressions),
+                                              None if no_unit else list(units),
+                                              dataset, inner, outer)
+                for (index, key) in enumerate(names):
+                    results[key] = values[..., index].squeeze()
+                log.info('Finished global evaluation.')
+            except Exception:
+                log.debug('Global evaluation failed. Evaluating one by one.')
+                for (key, expression, unit) in items:
+                    results[key] = self.evaluate(expression, unit, dataset,
+                                                 inner, outer)
+        return {key: results[key] for key in keys}
+
+    def modified(self, group=None, run=False):
+        # Marks the model as modified.
+        #
+        # `group` is the group in the model tree of the node that was
+        # changed, or that was run if `run` is `True`. It is `None` for
+        # changes to global parameters and the like.
+        #
+        # Bumps the version number of the model state, which is part of
+        # the keys of cached evaluation results, thus invalidating them.
+        # If the solver's inputs changed as well, also bumps the count
+        # that `solve()` compares to when deciding whether a study needs
+        # to be solved again. Running nodes only changes the inputs if
+        # they are geometry or mesh sequences, changes to datasets never
+        # do, and changes to result features do not count at all. Edits
+        # of geometry, mesh, physics, selection, and function nodes, as
+        # well as geometry builds, are counted separately for `build()`
+        # and `mesh()`.
+        if group in ('evaluations', 'tables', 'plots', 'exports'):
+            return
+        self.state['version'] += 1
+        if run:
+            inputs = group in ('geometries', 'meshes')
+        else:
+            inputs = (group != 'datasets')
+        if inputs:
+            self.state['inputs'] += 1
+        groups = ('geometries', 'meshes', 'physics', 'selections',
+                  'functions')
+        if group in groups and not run:
+            self.state[group] += 1
+        if group == 'geometries' and run:
+            self.state['builds'] += 1
+
+    def sequence_dependencies(self, node, names=None):
+        # Returns the names of parameters a geometry or mesh sequence uses.
+        #
+        # The property values of all nodes in the sequence are scanned for
+        # parameter names, and for mesh sequences those in all geometry
+        # sequences as well. The scan is skipped if the `names` found
+        # previously are passed in. Parameters that the expressions of
+        # those parameters refer to are included, and so on. Returns
+        # `None` if the properties cannot be read, for example because
+        # some are of a type this library does not support.
+        param = self.java.param()
+        parameters = {str(name): str(param.get(name))
+                      for name in param.varnames()}
+        if names is not None:
+            names = set(names) & parameters.keys()
+        else:
+            branches = [node]
+            if node.path[0] == 'meshes':
+                branches += (self/'geometries').children()
+            names = set()
+            try:
+                for branch in branches:
+                    snapshot = branch.snapshot(properties=True)
+                    for (path, item) in snapshot.walk():
+                        for value in item.properties.values():
+                            names |= identifiers(value) & parameters.keys()
+            except Exception as error:
+                log.debug(f'Could not scan sequence "{node.name()}": {error}')
+                return None
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            for other in identifiers(parameters[name]) & parameters.keys():
+                if other not in names:
+                    names.add(other)
+                    pending.append(other)
+        return names
+
+    def sequence_state(self, node, names):
+        # Returns the state that a geometry or mesh sequence depends on.
+        #
+        # That is the count of edits to geometry, selection, and function
+        # nodes, for mesh sequences also those to mesh and physics nodes
+        # as well as the count of geometry builds, and the values of the
+        # parameters with the given `names`.
+        param = self.java.param()
+        values = {}
+        for name in names:
+            try:
+                values[name] = str(param.get(name))
+            except Exception:
+                values[name] = None
+        if node.path[0] == 'meshes':
+            groups = ('geometries', 'selections', 'functions', 'meshes',
+                      'physics')
+            builds = self.state['builds']
+        else:
+            groups = ('geometries', 'selections', 'functions')
+            builds = None
+        edits = tuple(self.state[group] for group in groups)
+        return (edits, builds, values)
+
+    def sequence_current(self, node):
+        # Checks if a geometry or mesh sequence is up to date.
+        if node.path not in self.sequences:
+            return False
+        (edits, builds, values) = self.sequences[node.path]
+        state = self.sequence_state(node, values.keys())
+        return (state == (edits, builds, values))
+
+    def sequence_run(self, node):
+        # Runs a geometry or mesh sequence and records its state.
+        #
+        # The sequence's nodes are only scanned for parameter names if
+        # they, or other nodes the sequence depends on, were edited since
+        # the last run. If they cannot be scanned, no state is recorded,
+        # so the sequence will run every time.
+        previous = self.sequences.pop(node.path, None)
+        node.run()
+        (edits, builds, values) = self.sequence_state(node, ())
+        if previous and previous[0] == edits:
+            names = self.sequence_dependencies(node, previous[2].keys())
+        else:
+            names = self.sequence_dependencies(node)
+        if names is not None:
+            self.sequences[node.path] = self.sequence_state(node, names)
+
+    def sweep_native(self, study, names, points, expressions, units):
+        # Solves for all parameter combinations in a native sweep.
+        #
+        # Adds a parametric sweep to the study, runs it, and evaluates
+        # the expressions for each outer solution. The sweep is removed
+        # again afterwards, along with the nodes that solving it added to
+        # the results. Raises an error if the results cannot be found, in
+        # which case the caller falls back to solving point by point.
+        groups = ('plots', 'datasets', 'batches', 'solutions')
+        existing = {group: {node.tag() for node in self/group}
+                    for group in groups}
+        before = existing['datasets']
+        step = study.create('Parametric', name='sweep')
+        try:
+            step.property('sweeptype', 'sparse')
+            step.property('pname', names)
+            step.property('plistarr', [
+                ' '.join(str(point[i]).replace(' ', '') for point in points)
+                for i in range(len(names))])
+            self.solve(study, force=True)
+            candidates = []
+            for dataset in self/'datasets':
+                try:
+                    (indices, table, pnames) = self.outer(dataset, names=True)
+                except Exception:
+                    continue
+                if pnames == names and len(indices) == len(points):
+                    candidates.append(dataset)
+            if not candidates:
+                error = 'Could not find results of native parametric sweep.'
+                log.error(error)
+                raise RuntimeError(error)
+            created = [dataset for dataset in candidates
+                       if dataset.tag() not in before]
+            dataset = (created or candidates)[0]
+            (indices, values) = self.outer(dataset)
+            return [[self.evaluate(expression, unit, dataset,
+                                   outer=int(index))
+                     for (expression, unit) in zip(expressions, units)]
+                    for index in indices]
+        finally:
+            step.remove()
+            for group in groups:
+                for node in (self/group).children():
+                    if node.tag() not in existing[group]:
+                        node.remove()
+
+    def evaluation_key(self, expression, unit, dataset, inner, outer):
+        # Returns the key of cached evaluation results.
+        #
+        # Returns `None` if the arguments cannot be turned into a key, in
+        # which case the evaluation is not cached.
+        def freeze(value):
+            if isinstance(value, (list, tuple, ndarray)):
+                return tuple(freeze(item) for item in value)
+            if isinstance(value, integer):
+                return int(value)
+            return value
+        if isinstance(dataset, Node):
+            dataset = dataset.path
+        key = (freeze(expression), freeze(unit), freeze(dataset),
+               freeze(inner), freeze(outer), self.state['version'])
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def evaluation_dataset(self, dataset, inner, outer):
+        # Validates the evaluation arguments and returns the dataset node.
+        #
+        # If no dataset is given, the default dataset is returned, i.e.
+        # the one that a newly created evaluation feature would refer to.
         if dataset is not None:
             if isinstance(dataset, str):
                 dataset = self/'datasets'/dataset
@@ -491,12 +1159,9 @@ class Model:
             error = 'Argument "outer", if specified, must be an integer index.'
             log.error(error)
             raise TypeError(error)
-
-        # Find the default dataset if nothing specified.
         if not dataset:
-            eval = (self/'evaluations').create('Eval')
-            tag  = eval.property('data')
-            eval.remove()
+            (eval, defaults) = self.evaluation_feature('Eval')
+            tag = defaults['data']
             for dataset in self/'datasets':
                 if dataset.tag() == tag:
                     break
@@ -504,90 +1169,130 @@ class Model:
                 error = 'Could not determine default dataset.'
                 log.error(error)
                 raise RuntimeError(error)
-
         if not dataset.exists():
             error = f'Dataset "{dataset.name()}" does not exist.'
             log.error(error)
             raise ValueError(error)
-        log.info(f'Evaluating "{expression}" on dataset "{dataset.name()}".')
+        return dataset
 
-        # Find corresponding solution.
-        if 'solution' in dataset.properties():
-            tag = dataset.property('solution')
-        elif 'data' in dataset.properties():
-            tag = dataset.property('data')
-        for solution in self/'solutions':
-            if solution.tag() == tag:
-                break
-        else:
+    def dataset_solution(self, dataset):
+        # Returns the solution node the dataset refers to.
+        #
+        # All datasets are mapped to their solutions in one go, and the
+        # map is then reused until nodes in the studies, solutions, or
+        # datasets branch are created, removed, renamed, or have their
+        # properties changed. A cached solution that no longer exists,
+        # for example after changes made via the Java layer, triggers
+        # a rebuild as well.
+        solution = self.sources.get(dataset.path)
+        if dataset.path not in self.sources or (solution is not None
+                                                and not solution.exists()):
+            solutions = {node.tag(): node for node in self/'solutions'}
+            self.sources.clear()
+            for node in self/'datasets':
+                java = node.java
+                tag = None
+                for name in ('solution', 'data'):
+                    if java.hasProperty(name):
+                        tag = str(java.getString(name))
+                        break
+                self.sources[node.path] = solutions.get(tag)
+            solution = self.sources.get(dataset.path)
+        if solution is None:
             error = f'Dataset "{dataset.name()}" does not refer to a solution.'
             log.error(error)
             raise RuntimeError(error)
+        return solution
 
-        # Make sure solution has actually been computed.
+    def evaluation_solution(self, dataset):
+        # Returns the computed solution the dataset refers to.
+        solution = self.dataset_solution(dataset)
         if solution.java.isEmpty():
             error = 'The solution has not been computed.'
             log.error(error)
             raise RuntimeError(error)
+        return solution
 
-        # Try to perform a global evaluation, which may fail.
-        eval = (self/'evaluations').create('EvalGlobal')
+    def evaluate_global(self, expression, unit, dataset, inner, outer):
+        # Evaluates global expressions, raises an error if that fails.
+        #
+        # Returns the results before squeezing out singleton dimensions,
+        # so that the last axis indexes the expressions, if several.
+        (eval, defaults) = self.evaluation_feature('EvalGlobal')
         eval.property('expr', expression)
         if unit:
             eval.property('unit', unit)
         eval.property('data', dataset)
         if outer is not None:
             eval.property('outersolnum', outer)
-        try:
-            log.debug('Trying global evaluation.')
-            java = eval.java
-            results = array(java.computeResult())
-            if java.isComplex():
-                results = results[0].astype('complex') + 1j*results[1]
-            else:
-                results = results[0]
-            log.info('Finished global evaluation.')
-            if inner is None:
-                pass
-            elif inner == 'first':
-                results = results[0]
-            elif inner == 'last':
-                results = results[-1]
-            else:
-                if isinstance(inner, list):
-                    inner = array(inner)
-                results = results[inner-1]
-            return results.squeeze()
-        # Move on if this fails. Seems to not be a global expression then.
-        except Exception:
-            log.debug('Global evaluation failed. Moving on.')
-        finally:
-            eval.remove()
-
-        # For particle datasets, create an "EvalPoint" feature.
-        if dataset.type() == 'Particle':
-            eval = (self/'evaluations').create('EvalPoint')
-            if inner in ('first', 'last'):
-                eval.property('innerinput', inner)
-            elif inner is not None:
-                eval.property('innerinput', 'manual')
-                eval.property('solnum', inner)
-        # Otherwise create an "Eval" feature.
+        java = eval.java
+        results = array(java.computeResult())
+        if java.isComplex():
+            results = results[0].astype('complex') + 1j*results[1]
         else:
-            eval = (self/'evaluations').create('Eval')
-
-        # Set up the evaluation feature.
-        eval.property('expr', expression)
-        if unit:
-            eval.property('unit', unit)
-        eval.property('data', dataset)
-        if outer is not None:
-            eval.property('outersolnum', outer)
+            results = results[0]
+        if inner is None:
+            pass
+        elif inner == 'first':
+            results = results[0]
+        elif inner == 'last':
+            results = results[-1]
+        else:
+            if isinstance(inner, list):
+                inner = array(inner)
+            results = results[inner-1]
+        return results
 
-        # Retrieve the data.
-        log.info('Retrieving data.')
+    def evaluation_indices(self, dataset, inner, outer, chunk):
+        # Validates the arguments for step-wise evaluation.
+        #
+        # Returns the dataset node and the indices of the inner solutions
+        # to step through.
+        if not isinstance(chunk, (int, integer)) or chunk < 1:
+            error = 'Argument "chunk" must be a positive integer.'
+            log.error(error)
+            raise ValueError(error)
+        dataset = self.evaluation_dataset(dataset, inner, outer)
+        self.evaluation_solution(dataset)
+        (indices, values) = self.inner(dataset)
+        if isinstance(inner, str) and inner == 'first':
+            indices = indices[:1]
+        elif isinstance(inner, str) and inner == 'last':
+            indices = indices[-1:]
+        elif inner is not None:
+            indices = array(inner)
+        return (dataset, indices)
+
+    def evaluation_chunks(self, expression, unit, dataset, indices, outer,
+                                chunk):
+        # Retrieves results chunk by chunk of inner solutions.
+        #
+        # Yields the indices of each chunk along with the results before
+        # squeezing out singleton dimensions.
+        # The evaluation feature is fetched and set up anew for every
+        # chunk, as other evaluations may reuse it between two chunks.
+        particle = (dataset.type() == 'Particle')
+        for start in range(0, len(indices), chunk):
+            selection = indices[start:start+chunk]
+            (eval, defaults) = self.evaluation_feature(
+                'EvalPoint' if particle else 'Eval')
+            eval.property('expr', expression)
+            if unit:
+                eval.property('unit', unit)
+            eval.property('data', dataset)
+            if outer is not None:
+                eval.property('outersolnum', outer)
+            eval.property('innerinput', 'manual')
+            eval.property('solnum', [int(index) for index in selection])
+            yield (selection, self.evaluation_data(eval, expression, particle))
+
+    def evaluation_data(self, eval, expression, particle):
+        # Retrieves the results from a fully set up evaluation feature.
+        #
+        # Returns the results before squeezing out singleton dimensions,
+        # so that the first axis indexes the expressions, if several.
         java = eval.java
-        if dataset.type() == 'Particle':
+        if particle:
             results = array(java.getReal())
             if java.isComplex():
                 results = results.astype('complex')
@@ -600,28 +1305,45 @@ class Model:
             if java.isComplex():
                 results = results.astype('complex')
                 results += 1j * array(java.getImagData())
-            if inner == 'first':
-                results = results[:, 0, :]
-            elif inner == 'last':
-                results = results[:, -1, :]
-            elif inner is not None:
-                if isinstance(inner, list):
-                    inner = array(inner)
-                results = results[:, inner-1, :]
-        log.info('Finished retrieving data.')
-
-        # Remove the temporary evaluation feature we added to the model.
-        eval.remove()
-
-        # Squeeze out singleton array dimensions.
-        if isinstance(expression, (list, tuple)):
-            results = [result.squeeze() for result in results]
-        else:
-            results = results.squeeze()
-
-        # Return array of results.
         return results
 
+    def evaluation_feature(self, type):
+        # Returns an evaluation feature of the given type for reuse.
+        #
+        # Evaluation features are created the first time they are needed
+        # and are then kept in the model tree, until the model is saved,
+        # cleared, or reset.
+        # Every time a feature is handed out again, the properties that
+        # `evaluate()` may change are restored to the defaults the feature
+        # had when it was created. These defaults are returned as well.
+        # The feature is created anew if it has been removed meanwhile,
+        # or if datasets were added or removed, as that may change the
+        # default dataset that a new feature would refer to.
+        datasets = tuple(str(tag) for tag in (self/'datasets').java.tags())
+        if type in self.pool:
+            (eval, defaults, tags) = self.pool.pop(type)
+            if tags == datasets and eval.exists():
+                for (name, value) in defaults.items():
+                    eval.property(name, '' if value is None else value)
+                self.pool[type] = (eval, defaults, tags)
+                return (eval, defaults)
+            if eval.exists():
+                eval.remove()
+        eval = (self/'evaluations').create(type)
+        java = eval.java
+        names = ('expr', 'unit', 'data', 'outersolnum', 'innerinput', 'solnum')
+        defaults = {name: eval.property(name)
+                    for name in names if java.hasProperty(name)}
+        self.pool[type] = (eval, defaults, datasets)
+        return (eval, defaults)
+
+    def release_evaluations(self):
+        # Removes the evaluation features kept for reuse from the model.
+        for (eval, defaults, datasets) in self.pool.values():
+            if eval.exists():
+                eval.remove()
+        self.pool.clear()
+
     ####################################
     # Interaction                      #
     ####################################
@@ -685,10 +1407,11 @@ class Model:
             if isinstance(value, complex):
                 value = str(value)
             self.java.param().set(name, value)
+            self.modified()
 
-    def parameters(self, evaluate=False):
+    def parameters(self, values=None, evaluate=False):
         """
-        Returns the global model parameters.
+        Returns or sets the global model parameters.
 
         The parameters are returned as a dictionary indexed by the
         parameter names and mapping to the parameter values.
@@ -698,6 +1421,11 @@ class Model:
         the expressions are evaluated and the corresponding numbers
         are returned.
 
+        If a dictionary of `values` is given, indexed by parameter
+        names, those parameters are set all in one go, which is faster
+        than calling [`parameter()`](#Model.parameter) for each of them.
+        Values are accepted in the same form as by that method.
+
         *Warning*: Prior to version 1.0, this method would return
         a list of named tuples holding name, value, and description.
         It now returns a dictionary, which is a breaking change that
@@ -705,12 +1433,57 @@ class Model:
         can be retrieved by additionally calling `.description()` or
         `.descriptions()`.
         """
+        if isinstance(values, bool):
+            # Support `evaluate` passed as the only positional argument.
+            (values, evaluate) = (None, values)
+        param = self.java.param()
+        if values is not None:
+            for (name, value) in values.items():
+                if isinstance(value, complex):
+                    value = str(value)
+                param.set(name, value)
+            self.modified()
+            return
         if not evaluate:
-            return {str(name): str(self.java.param().get(name))
-                    for name in self.java.param().varnames()}
+            return {str(name): str(param.get(name))
+                    for name in param.varnames()}
         else:
-            return {str(name): self.java.param().evaluate(name)
-                    for name in self.java.param().varnames()}
+            return {str(name): param.evaluate(name)
+                    for name in param.varnames()}
+
+    def parameter_table(self):
+        """
+        Returns all details of all global model parameters.
+
+        The details are returned as a dictionary indexed by the
+        parameter names. Each item is itself a dictionary holding the
+        parameter's `'value'`, i.e. the expression as entered by the
+        user, the `'number'` that expression evaluates to (possibly a
+        complex number, or `None` if evaluation fails), the `'unit'`
+        of that number, and the parameter's `'description'`.
+
+        This takes just one pass over the parameters, which is much
+        faster than calling [`parameters()`](#Model.parameters) and
+        [`descriptions()`](#Model.descriptions) separately.
+        """
+        param = self.java.param()
+        table = {}
+        for name in param.varnames():
+            try:
+                number = param.evaluate(name)
+            except Exception:
+                try:
+                    value = param.evaluateComplex(name)
+                    number = complex(value[0], value[1])
+                except Exception:
+                    number = None
+            table[str(name)] = {
+                'value':       str(param.get(name)),
+                'number':      number,
+                'unit':        str(param.evaluateUnit(name)),
+                'description': str(param.descr(name)),
+            }
+        return table
 
     def description(self, name, text=None):
         """
@@ -727,7 +1500,9 @@ class Model:
 
     def descriptions(self):
         """Returns all parameter descriptions as a dictionary."""
-        return {name: self.description(name) for name in self.parameters()}
+        param = self.java.param()
+        return {str(name): str(param.descr(name))
+                for name in param.varnames()}
 
     def property(self, node, name, value=None):
         """
@@ -852,6 +1627,12 @@ class Model:
 
     def clear(self):
         """Clears stored solution, mesh, and plot data."""
+        self.release_evaluations()
+        self.resolved.clear()
+        self.values.clear()
+        self.sources.clear()
+        self.sequences.clear()
+        self.modified()
         log.info('Clearing stored plot data.')
         (self/'plots').java.clearStoredPlotData()
         log.info('Finished clearing plots.')
@@ -867,7 +1648,13 @@ class Model:
     def reset(self):
         """Resets the modeling history."""
         log.info('Resetting modeling history.')
+        self.release_evaluations()
         self.java.resetHist()
+        self.resolved.clear()
+        self.values.clear()
+        self.sources.clear()
+        self.sequences.clear()
+        self.modified()
         log.info('Finished resetting history.')
 
     def save(self, path=None, format=None):
@@ -887,6 +1674,9 @@ class Model:
 
         Imposes the correct file ending for the format. Overwrites
         existing files.
+
+        Evaluation features that [`evaluate()`](#Model.evaluate) keeps
+        in the model for reuse are removed before saving.
         """
 
         # Coerce paths given as string to Path objects.
@@ -923,6 +1713,9 @@ class Model:
             log.error(error)
             raise ValueError(error)
 
+        # Remove evaluation features added by `evaluate()`.
+        self.release_evaluations()
+
         # Use model name if no file name specified.
         if path is None:
             file = self.file()
@@ -1003,6 +1796,7 @@ class Model:
             node.active(True)
         elif action in ('disable', 'off', 'deactivate'):
             node.active(False)
+        self.modified('physics')
 
     def load(self, file, interpolation):
         # Loads data from a file and assigns it to an interpolation function.
@@ -1019,4 +1813,24 @@ class Model:
         self.java.func(tag).discardData()
         self.java.func(tag).set('filename', f'{file}')
         self.java.func(tag).importData()
+        self.values.clear()
+        self.modified('functions')
         log.info('Finished loading external data.')
+
+
+########################################
+# Expressions                          #
+########################################
+
+def identifiers(value):
+    """Returns the set of names that occur in (sequences of) strings."""
+    if isinstance(value, str):
+        return set(findall(r'[A-Za-z_]\w*', value))
+    if isinstance(value, ndarray) and value.dtype.kind not in 'UO':
+        return set()
+    if isinstance(value, (list, tuple, ndarray)):
+        names = set()
+        for item in value:
+            names |= identifiers(item)
+        return names
+    return set()
@@ -1,9 +1,15 @@
 ﻿"""Provides the wrapper class for a model node."""
 
+########################################
+# Components                           #
+########################################
+from .config import option             # configuration
+
 ########################################
 # Dependencies                         #
 ########################################
 from numpy import array, ndarray       # numerical array
+from numpy import ascontiguousarray    # contiguous array
 from jpype import JBoolean             # Java boolean
 from jpype import JInt                 # Java integer
 from jpype import JDouble              # Java float
@@ -12,6 +18,8 @@ from jpype import JArray               # Java array
 from jpype import JClass               # Java class
 from numpy import integer              # NumPy integer
 from pathlib import Path               # file-system path
+from collections import namedtuple     # named tuple
+from copy import deepcopy              # deep copy
 from re import split                   # string splitting
 from json import load as json_load     # JSON parser
 from difflib import get_close_matches  # fuzzy matching
@@ -105,11 +113,13 @@ class Node:
     ####################################
 
     def __init__(self, model, path=None):
+        tags = None
         if path is None:
             path = ('',)
         elif isinstance(path, str):
             path = parse(path)
         elif isinstance(path, Node):
+            tags = path.tags
             path = path.path
         else:
             error = f'Node path {path!r} is not a string or Node instance.'
@@ -168,6 +178,8 @@ class Node:
             path = (self.alias[path[0]],) + path[1:]
         self.path = path
         """Path of this node reference from the model's root."""
+        self.tags = tags if tags else (None,) * len(path)
+        """Tags along the node path, or `None` where not yet resolved."""
 
     def __str__(self):
         return join(self.path)
@@ -181,7 +193,9 @@ class Node:
     def __truediv__(self, other):
         if isinstance(other, str):
             other = other.lstrip('/')
-            return self.__class__(self.model, join(parse(f'{self}/{other}')))
+            node = self.__class__(self.model, join(parse(f'{self}/{other}')))
+            node.tags = self.tags + node.tags[len(self.tags):]
+            return node
         return NotImplemented
 
     def __contains__(self, node):
@@ -205,29 +219,72 @@ class Node:
         it is a function that performs a top-down search of the model
         tree in order to resolve the node reference. So it introduces
         a certain overhead every time it is accessed.
+
+        That overhead is reduced by remembering, for each model, the
+        Java objects that node references were previously resolved to.
+        The cache is kept up to date when nodes are created, renamed,
+        retagged, or removed via this class. It can be turned off by
+        setting the configuration option `'nodecache'` to `False`.
+
+        Each node reference also records the tags along its path once
+        resolved. Subsequent look-ups then access the Java objects by
+        tag directly, level by level, instead of comparing the names
+        of all sibling nodes. They only fall back to the name search
+        if a tag no longer exists or now refers to a renamed node.
         """
         if self.is_root():
             return self.model.java
-        name = self.name()
-        if self.is_group():
-            if name in self.groups:
-                return eval(self.groups[name])
-            else:
+        cache = self.model.resolved if option('nodecache') else None
+
+        # Start from the closest ancestor that was resolved before.
+        depth = len(self.path)
+        java  = None
+        while cache is not None and depth > 0:
+            java = lookup(cache, self.path[:depth])
+            if java is not None:
+                break
+            depth -= 1
+        if java is None:
+            group = self.path[0]
+            if group not in self.groups:
                 return None
-        parent = self.parent()
-        java = parent.java
-        if not java:
-            return None
-        if parent.is_group():
-            container = java
-        elif hasattr(java, 'propertyGroup'):
-            container = java.propertyGroup()
-        else:
-            container = java.feature()
-        for tag in container.tags():
-            member = container.get(tag)
-            if name == escape(member.label()):
-                return member
+            java = eval(self.groups[group])
+            depth = 1
+            if cache is not None:
+                cache[self.path[:1]] = java
+
+        # Descend the model tree from there, by tag if known, else by name.
+        tags = list(self.tags)
+        for level in range(depth, len(self.path)):
+            if level == 1:
+                container = java
+            elif hasattr(java, 'propertyGroup'):
+                container = java.propertyGroup()
+            else:
+                container = java.feature()
+            name = self.path[level]
+            java = None
+            if tags[level]:
+                try:
+                    member = container.get(tags[level])
+                    if name == str(member.label()):
+                        java = member
+                except Exception:
+                    pass
+            if java is None:
+                for tag in container.tags():
+                    member = container.get(tag)
+                    if name == str(member.label()):
+                        java = member
+                        tags[level] = str(tag)
+                        break
+                else:
+                    self.tags = tuple(tags)
+                    return None
+            if cache is not None:
+                cache[self.path[:level+1]] = java
+        self.tags = tuple(tags)
+        return java
 
     def java_if_exists(self):
         # Returns `self.java` if the node exists, raises an error otherwise.
@@ -273,23 +330,15 @@ class Node:
         if self.is_root():
             return None
         else:
-            return self.__class__(self.model, join(self.path[:-1]))
+            node = self.__class__(self.model, join(self.path[:-1]))
+            node.tags = self.tags[:-1]
+            return node
 
     def children(self):
         """Returns all child nodes."""
-        java = self.java
         if self.is_root():
             return [self.__class__(self.model, group) for group in self.groups]
-        elif self.is_group():
-            return [self/escape(java.get(tag).label()) for tag in java.tags()]
-        elif hasattr(java, 'propertyGroup'):
-            return [self/escape(java.propertyGroup(tag).label())
-                    for tag in java.propertyGroup().tags()]
-        elif hasattr(java, 'feature'):
-            return [self/escape(java.feature(tag).label())
-                    for tag in java.feature().tags()]
-        else:
-            return []
+        return [child for (child, java) in members(self, self.java)]
 
     def is_root(self):
         """Checks if the node is the model's root node."""
@@ -360,6 +409,46 @@ class Node:
             items += child.problems()
         return items
 
+    def snapshot(self, properties=False):
+        """
+        Captures the current state of the node and its descendants.
+
+        Returns a [`Snapshot`](#Snapshot) of this branch of the model
+        tree that records name, tag, feature type, and activation state
+        of each node, and also its properties if `properties` is `True`.
+        The model tree is traversed only once to that end, which is much
+        faster than inspecting the nodes one by one, especially in
+        client–server mode.
+        """
+
+        def capture(node, java):
+            if node.is_root():
+                children = [(child, child.java) for child in node.children()]
+                name = node.name()
+            else:
+                children = members(node, java)
+                name = node.path[-1]
+            if properties:
+                values = {}
+                if hasattr(java, 'properties'):
+                    for key in sorted(str(key) for key in java.properties()):
+                        values[key] = get(java, key)
+            else:
+                values = None
+            return Snapshot(
+                name       = name,
+                tag        = str(java.tag()),
+                type       = str(java.getType())
+                             if hasattr(java, 'getType') else None,
+                active     = bool(java.isActive())
+                             if hasattr(java, 'isActive') else True,
+                properties = values,
+                children   = tuple(capture(child, member)
+                                   for (child, member) in children),
+            )
+
+        return capture(self, self.java_if_exists())
+
     ####################################
     # Interaction                      #
     ####################################
@@ -375,9 +464,11 @@ class Node:
             log.error(error)
             raise PermissionError(error)
         java = self.java
+        forget(self)
         if java:
             java.label(name)
         self.path = self.path[:-1] + (name,)
+        forget(self)
 
     def retag(self, tag):
         """Assigns a new tag to the node."""
@@ -391,6 +482,8 @@ class Node:
             raise PermissionError(error)
         java = self.java_if_exists()
         java.tag(tag)
+        self.tags = self.tags[:-1] + (str(tag),)
+        forget(self)
 
     def property(self, name, value=None):
         """
@@ -401,8 +494,16 @@ class Node:
         """
         java = self.java_if_exists()
         if value is None:
-            return get(java, name)
+            if not option('propcache'):
+                return get(java, name)
+            values = self.model.values.setdefault(self.path, {})
+            if name not in values:
+                values.update(read(java, [name]))
+            return deepcopy(values[name])
         else:
+            self.model.values.pop(self.path, None)
+            modified(self)
+            unlink(self)
             java.set(name, cast(value))
 
     def properties(self):
@@ -411,12 +512,23 @@ class Node:
 
         In the Comsol GUI, properties are displayed in the Settings tab
         of the model node (not to be confused with the Properties tab).
+
+        If the configuration option `'propcache'` is set to `True`,
+        property values are cached and only read from the model again
+        after they were changed via this class or by operations such as
+        running or creating nodes. Changes made via the Java layer would
+        then go unnoticed. The option is off by default.
         """
         java = self.java_if_exists()
         if not hasattr(java, 'properties'):
             return {}
         names = sorted(str(name) for name in java.properties())
-        return {name: get(java, name) for name in names}
+        if not option('propcache'):
+            return read(java, names)
+        values = self.model.values.setdefault(self.path, {})
+        values.update(read(java, [name for name in names
+                                  if name not in values]))
+        return {name: deepcopy(values[name]) for name in names}
 
     def select(self, entity):
         """
@@ -440,6 +552,8 @@ class Node:
             error = "Use the Java layer to change a geometry node's selection."
             log.error(error)
             raise NotImplementedError(error)
+        self.model.values.pop(self.path, None)
+        modified(self)
         try:
             java = java.selection()
         except Exception:
@@ -523,6 +637,7 @@ class Node:
         to disable it.
         """
         java = self.java_if_exists()
+        modified(self)
         if action == 'flip':
             java.active(not java.isActive())
         elif action in ('enable', 'on', 'activate'):
@@ -537,6 +652,9 @@ class Node:
             error = f'Node "{self}" does not implement "run" operation.'
             log.error(error)
             raise RuntimeError(error)
+        self.model.values.clear()
+        self.model.sources.clear()
+        modified(self, run=True)
         java.run()
 
     def import_(self, file):
@@ -556,6 +674,8 @@ class Node:
         self.property('filename', f'{file}')
         self.java.discardData()
         self.java.importData()
+        self.model.values.clear()
+        modified(self)
         log.info('Finished loading external data.')
 
     def create(self, *arguments, name=None):
@@ -611,6 +731,7 @@ class Node:
         else:
             name = escape(container.get(tag).label())
         child = self/name
+        child.tags = child.tags[:-1] + (str(tag),)
         check = tag_pattern(feature_path(child))
         if pattern != check:
             pattern = check
@@ -622,6 +743,9 @@ class Node:
                 tag = pattern
             log.debug(f'Retagging "{child}": "{child.tag()}" → "{tag}".')
             child.retag(tag)
+        forget(child)
+        self.model.values.clear()
+        modified(child)
         return child
 
     def remove(self):
@@ -647,6 +771,93 @@ class Node:
         else:
             container = java.feature()
         container.remove(self.java.tag())
+        forget(self)
+        modified(self)
+
+
+########################################
+# Snapshot                             #
+########################################
+
+class Snapshot(namedtuple('Snapshot',
+               ('name', 'tag', 'type', 'active', 'properties', 'children'))):
+    """
+    Holds the state of a branch of the model tree at one point in time.
+
+    Snapshots are created by [`Model.snapshot()`](#Model.snapshot) or
+    [`Node.snapshot()`](#Node.snapshot), which traverse the model tree
+    only once. They are immutable named tuples, independent of the Java
+    layer, and can therefore be inspected at no further cost, displayed
+    with [`mph.tree()`](#tree), or be written to disk.
+
+    Each snapshot holds the node's `name`, `tag`, feature `type`,
+    whether it is `active`, its `properties` as a dictionary (or
+    `None` if they were not captured), and the snapshots of its
+    `children`. Like node references, snapshots support the division
+    operator in order to access nodes further down the tree:
+    ```python
+    >>> snapshot = model.snapshot()
+    >>> (snapshot/'functions/step').tag
+    'step1'
+    ```
+    """
+
+    __slots__ = ()
+
+    def __truediv__(self, other):
+        if isinstance(other, str):
+            snapshot = self
+            for name in parse(other):
+                if not name:
+                    continue
+                for child in snapshot.children:
+                    if child.name == name:
+                        snapshot = child
+                        break
+                else:
+                    error = f'Node "{other}" is not in snapshot "{self.name}".'
+                    log.error(error)
+                    raise LookupError(error)
+            return snapshot
+        return NotImplemented
+
+    def walk(self):
+        """Yields path and snapshot of this node and all its descendants."""
+        stack = [('', self)]
+        while stack:
+            (path, snapshot) = stack.pop()
+            yield (path, snapshot)
+            for child in reversed(snapshot.children):
+                name = escape(child.name)
+                stack.append((f'{path}/{name}' if path else name, child))
+
+    def serialize(self):
+        """Returns the snapshot as nested dictionaries of plain values."""
+        if self.properties is None:
+            properties = None
+        else:
+            properties = {name: plain(value)
+                          for (name, value) in self.properties.items()}
+        return {
+            'name':       self.name,
+            'tag':        self.tag,
+            'type':       self.type,
+            'active':     self.active,
+            'properties': properties,
+            'children':   [child.serialize() for child in self.children],
+        }
+
+
+def plain(value):
+    """Converts a property value to plain, JSON-compatible data types."""
+    if isinstance(value, ndarray):
+        return [plain(item) for item in value.tolist()]
+    elif isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    elif isinstance(value, Path):
+        return str(value)
+    else:
+        return value
 
 
 ########################################
@@ -682,6 +893,72 @@ def unescape(name):
     return name.replace('//', '/')
 
 
+########################################
+# Resolution cache                     #
+########################################
+
+def lookup(cache, path):
+    """Returns the Java object cached for the node path, if still valid."""
+    java = cache.get(path)
+    if java is None or len(path) == 1:
+        return java
+    # Verify the label, as it may have been changed via the Java layer.
+    try:
+        valid = (path[-1] == str(java.label()))
+    except Exception:
+        valid = False
+    if not valid:
+        del cache[path]
+        return None
+    return java
+
+
+def members(node, java):
+    """Returns the child nodes along with the Java objects they refer to."""
+    if node.is_group():
+        container = java
+    elif hasattr(java, 'propertyGroup'):
+        container = java.propertyGroup()
+    elif hasattr(java, 'feature'):
+        container = java.feature()
+    else:
+        return []
+    children = []
+    for tag in container.tags():
+        member = container.get(tag)
+        child = node/escape(member.label())
+        child.tags = child.tags[:-1] + (str(tag),)
+        remember(child, member)
+        children.append((child, member))
+    return children
+
+
+def remember(node, java):
+    """Caches the Java object a node resolves to, unless already cached."""
+    if option('nodecache'):
+        node.model.resolved.setdefault(node.path, java)
+
+
+def forget(node):
+    """Removes the node and its descendants from the model's caches."""
+    depth = len(node.path)
+    for cache in (node.model.resolved, node.model.values):
+        for path in [path for path in cache if path[:depth] == node.path]:
+            del cache[path]
+    unlink(node)
+
+
+def modified(node, run=False):
+    """Marks the model as modified by a change to, or by running, the node."""
+    node.model.modified(node.path[0] if node.path else None, run)
+
+
+def unlink(node):
+    """Drops the model's dataset-to-solution map if the node affects it."""
+    if node.path[:1] in (('studies',), ('solutions',), ('datasets',)):
+        node.model.sources.clear()
+
+
 ########################################
 # Tag patterns                         #
 ########################################
@@ -707,11 +984,20 @@ def feature_path(node):
 
 def tag_pattern(feature_path):
     """Looks up the tag pattern for the best match to given feature path."""
-    (group, type) = (feature_path[0], feature_path[-1])
     patterns = load_patterns()
-    selected = [key for key in patterns
-                if key.startswith(group) and key.endswith(type)]
-    matches = get_close_matches(' → '.join(feature_path), selected)
+    key = ' → '.join(feature_path)
+    if key in patterns:
+        return patterns[key]
+    return closest_pattern(key, feature_path[0], feature_path[-1])
+
+
+@lru_cache(maxsize=None)
+def closest_pattern(key, group, type):
+    """Looks up the tag pattern by fuzzy matching of the feature path."""
+    patterns = load_patterns()
+    selected = [other for other in patterns
+                if other.startswith(group) and other.endswith(type)]
+    matches = get_close_matches(key, selected)
     if matches:
         return patterns[matches[0]]
     elif type != '?':
@@ -754,14 +1040,32 @@ def cast(value):
             item = item[0]
         else:
             datatype = cast(item).__class__
+            # Convert numerical data in bulk if it fits into a NumPy array.
+            kinds = {JBoolean: 'b', JInt: 'i', JDouble: 'f'}
+            if datatype in kinds:
+                try:
+                    numbers = array(value)
+                except ValueError:
+                    numbers = None
+                if (numbers is not None and numbers.ndim == dimension
+                        and numbers.dtype.kind == kinds[datatype]):
+                    return cast(numbers)
         value = [cast(item) for item in value]
         return JArray(datatype, dimension)(value)
     elif isinstance(value, ndarray):
+        # JPype copies contiguous arrays of matching type in one go.
         if value.dtype.kind == 'b':
+            value = ascontiguousarray(value, dtype='bool')
             return JArray(JBoolean, value.ndim)(value)
         elif value.dtype.kind == 'f':
+            value = ascontiguousarray(value, dtype='float64')
             return JArray(JDouble, value.ndim)(value)
-        elif value.dtype.kind == 'i':
+        elif value.dtype.kind in ('i', 'u'):
+            if value.size and (value.min() < -2**31 or value.max() >= 2**31):
+                error = 'Integer values are out of range of 32-bit integers.'
+                log.error(error)
+                raise ValueError(error)
+            value = ascontiguousarray(value, dtype='int32')
             return JArray(JInt, value.ndim)(value)
         elif value.dtype.kind == 'O':
             if value.ndim > 2:
@@ -784,21 +1088,40 @@ def cast(value):
         raise TypeError(error)
 
 
-def get(java, name):
-    """Returns the value of a Java node property as a Python data type."""
-    datatype = java.getValueType(name)
+def read(java, names):
+    """
+    Returns the values of the named Java node properties as a dictionary.
+
+    The value type of each property is queried from the node itself, as
+    it may differ between nodes of the same feature type. Comsol's typed
+    getters tend to coerce values of another type rather than fail, so
+    a type guessed from a similar node could not be relied upon.
+    """
+    return {name: get(java, name, str(java.getValueType(name)))
+            for name in names}
+
+
+def get(java, name, datatype=None):
+    """
+    Returns the value of a Java node property as a Python data type.
+
+    The Java `datatype` of the property value is queried from the node,
+    unless given.
+    """
+    if datatype is None:
+        datatype = str(java.getValueType(name))
     if datatype == 'Boolean':
         return java.getBoolean(name)
     elif datatype == 'BooleanArray':
         return array(java.getBooleanArray(name))
     elif datatype == 'BooleanMatrix':
-        return array([line for line in java.getBooleanMatrix(name)])
+        return matrix(java.getBooleanMatrix(name))
     elif datatype == 'Double':
         return java.getDouble(name)
     elif datatype == 'DoubleArray':
         return array(java.getDoubleArray(name))
     elif datatype == 'DoubleMatrix':
-        return array([line for line in java.getDoubleMatrix(name)])
+        return matrix(java.getDoubleMatrix(name))
     elif datatype == 'DoubleRowMatrix':
         value = java.getDoubleMatrix(name)
         if len(value) == 0:
@@ -819,7 +1142,7 @@ def get(java, name):
     elif datatype == 'IntArray':
         return array(java.getIntArray(name))
     elif datatype == 'IntMatrix':
-        return array([line for line in java.getIntMatrix(name)])
+        return matrix(java.getIntMatrix(name))
     elif datatype == 'None':
         return None
     elif datatype == 'Selection':
@@ -841,6 +1164,16 @@ def get(java, name):
         raise TypeError(error)
 
 
+def matrix(value):
+    """Converts a Java matrix, i.e. an array of arrays, to a NumPy array."""
+    # JPype transfers rectangular matrices of primitives in one go via the
+    # buffer protocol. Ragged ones have to be converted row by row.
+    try:
+        return array(memoryview(value))
+    except (TypeError, ValueError, BufferError):
+        return array([line for line in value])
+
+
 ########################################
 # Inspection                           #
 ########################################
@@ -873,14 +1206,14 @@ def tree(node, max_depth=None):
 
     Often the node would refer to the model's root in order to inspect
     the entire model tree. A [`Model`](#Model) object is therefore also
-    accepted as a value for `node`.
+    accepted as a value for `node`, as is a [`Snapshot`](#Snapshot).
 
     Note that this function performs poorly in client–server mode, the
     default on Linux and macOS, especially for complex models. The
     client–server communication introduces inefficiencies that do not
     occur in stand-alone mode, the default on Windows, where the model
     tree, i.e. the hierarchy of related Java objects, can be traversed
-    reasonably fast.
+    reasonably fast. Displaying a snapshot avoids these inefficiencies.
     """
 
     def traverse(node, levels, max_depth):
@@ -888,13 +1221,17 @@ def tree(node, max_depth=None):
             return
         markers = ''.join('   ' if last else '│  ' for last in levels[:-1])
         markers += '' if not levels else '└─ ' if levels[-1] else '├─ '
-        print(f'{markers}{node.name()}')
-        children = node.children()
+        if isinstance(node, Snapshot):
+            print(f'{markers}{escape(node.name)}')
+            children = node.children
+        else:
+            print(f'{markers}{node.name()}')
+            children = node.children()
         last = len(children) - 1
         for (index, child) in enumerate(children):
             traverse(child, levels + [index == last], max_depth)
 
-    if not isinstance(node, Node):
+    if not isinstance(node, (Node, Snapshot)):
         # Assume node is actually a model object and traverse from root.
         node = node/None
     return traverse(node, [], max_depth)
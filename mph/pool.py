@@ -0,0 +1,437 @@
+﻿"""Distributes jobs over a pool of worker processes running Comsol."""
+
+########################################
+# Components                           #
+########################################
+from .session import start             # local Comsol session
+
+########################################
+# Dependencies                         #
+########################################
+from multiprocessing import get_context  # process start method
+from multiprocessing import cpu_count  # number of (logical) cores
+from concurrent.futures import Future  # pending result
+from concurrent.futures import as_completed  # completion order
+from threading import Thread, Lock     # multi-threading
+from queue import Empty                # queue-is-empty exception
+from itertools import count            # running number
+from pathlib import Path               # file-system path
+from collections import namedtuple     # named tuple
+from numpy import ndarray              # numerical array
+import weakref                         # weak references
+import pickle                          # object serialization
+import platform                        # platform information
+import traceback                       # exception tracebacks
+from logging import getLogger          # event logging
+try:
+    from multiprocessing import shared_memory  # shared memory blocks
+except ImportError:                    # Python < 3.8
+    shared_memory = None
+
+########################################
+# Globals                              #
+########################################
+system = platform.system()             # operating system
+log    = getLogger(__package__)        # event log
+
+Shared = namedtuple('Shared', ('name', 'shape', 'dtype'))
+"""Describes an array that a worker placed in a shared-memory block."""
+
+
+########################################
+# Pool                                 #
+########################################
+
+class Pool:
+    """
+    Distributes jobs over a pool of worker processes.
+
+    Only one Comsol client can run inside a Python process. This class
+    works around that limitation by starting a number of `workers`,
+    separate Python processes that each start a Comsol session of their
+    own, restricted to the given number of processor `cores`, and then
+    wait for jobs to be submitted. If the number of workers is not
+    given, as many are started as there are cores available, divided
+    by the cores per worker.
+
+    Each worker preloads the `models`, a file path or list of file
+    paths, once when it starts up, so that the models don't have to
+    be loaded again for each job. A job is a function that is called
+    with the preloaded model as its first argument, followed by any
+    arguments passed along when submitting the job. If a list of
+    models was given, the function receives the list of models, and
+    if no models were given, only the job's own arguments.
+
+    Example usage:
+    ```python
+    import mph
+
+    def capacitance(model, d):
+        model.parameter('d', f'{d} [mm]')
+        model.solve('static')
+        return model.evaluate('2*es.intWe/U^2', 'pF')
+
+    if __name__ == '__main__':
+        with mph.Pool(workers=4, models='capacitor.mph') as pool:
+            C = pool.map(capacitance, [0.5, 1.0, 1.5, 2.0, 2.5, 3.0])
+    ```
+
+    Each worker runs its jobs one after another on the same preloaded
+    models. Changes that a job makes to a model, such as new parameter
+    values or solutions, thus persist into later jobs on that worker.
+    Jobs should therefore set all parameters they depend on, rather
+    than rely on the values stored in the model file.
+
+    Job functions must be defined at the top level of a module, and
+    their arguments and return values must be picklable, as they are
+    transferred between processes. The workers are started with the
+    `'spawn'` method, so the main script has to be guarded against
+    re-execution by the usual `if __name__ == '__main__'` clause.
+
+    Exceptions raised by a job are re-raised in the parent process
+    when its result is retrieved. So are errors pickling the job
+    itself. If a worker fails to start, for example because Comsol
+    cannot be found, the error is logged and the remaining workers
+    carry on. If a worker dies while running a job, for example
+    because Comsol crashed, that job fails with a `RuntimeError`. If
+    all workers have exited, jobs still pending fail that way too.
+
+    A specific Comsol `version` can be selected if several are
+    installed, for example `version='6.0'`. Otherwise the latest
+    version is used.
+
+    NumPy arrays in job results that are larger than `share` bytes
+    (one megabyte by default) are not pickled and sent through a pipe,
+    but placed in [shared memory][1] by the worker. The results then
+    contain arrays that directly use that memory, without copying
+    it. The memory is released once those arrays, and any views of
+    them, are no longer referenced, or else when Python exits. Pass
+    `share=None` to always pickle. Shared memory requires Python 3.8
+    or newer, and is not used on Windows, where a block vanishes as
+    soon as the worker lets go of it.
+
+    [1]: https://docs.python.org/3/library/\
+multiprocessing.shared_memory.html
+    """
+
+    def __init__(self, workers=None, cores=1, models=None, version=None,
+                       share=2**20):
+        if models is None:
+            files = []
+        elif isinstance(models, (str, Path)):
+            files = [str(models)]
+        else:
+            files = [str(file) for file in models]
+        if workers is None:
+            workers = max(1, cpu_count() // (cores or cpu_count()))
+        context = get_context('spawn')
+        self.jobs = context.Queue()
+        """Queue of jobs waiting to be picked up by a worker."""
+        self.results = context.Queue()
+        """Queue of results delivered by the workers."""
+        self.futures = {}
+        """Futures of pending jobs, indexed by job number."""
+        self.held = {}
+        """Numbers of the jobs being run, indexed by worker process id."""
+        self.lock = Lock()
+        self.numbers = count()
+        self.blocks = []
+        """Finalizers that release shared-memory blocks once unused."""
+        if shared_memory is None or system == 'Windows':
+            share = None
+        self.processes = []
+        """Worker processes."""
+        self.claims = []
+        """Pipes over which the workers announce the jobs they start."""
+        single = isinstance(models, (str, Path))
+        log.info(f'Starting pool of {workers} worker processes.')
+        for _ in range(workers):
+            (receiver, sender) = context.Pipe(duplex=False)
+            process = context.Process(
+                target=work,
+                args=(self.jobs, self.results, sender, cores, version,
+                      files, single, share),
+                daemon=True)
+            process.start()
+            sender.close()
+            self.processes.append(process)
+            self.claims.append(receiver)
+        self.collector = Thread(target=self.collect, daemon=True)
+        self.collector.start()
+        self.open = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.shutdown()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(workers={len(self.processes)})'
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Submits a job and returns a future for its result.
+
+        The job `function` is called in one of the workers with the
+        preloaded model(s) and the given positional and keyword
+        arguments. Returns a [`Future`][1] right away, from which the
+        result can be retrieved once available.
+
+        [1]: https://docs.python.org/3/library/\
+concurrent.futures.html#future-objects
+        """
+        if not self.open:
+            error = 'Cannot submit jobs to a pool that was shut down.'
+            log.error(error)
+            raise RuntimeError(error)
+        future = Future()
+        try:
+            payload = pickle.dumps((function, args, kwargs))
+        except Exception as error:
+            future.set_exception(error)
+            return future
+        with self.lock:
+            number = next(self.numbers)
+            self.futures[number] = future
+        self.jobs.put((number, payload))
+        return future
+
+    def map(self, function, iterable):
+        """
+        Runs the job `function` for each item and returns all results.
+
+        Results are returned as a list in the same order as the items.
+        If any of the jobs raised an exception, it is re-raised here.
+        """
+        futures = [self.submit(function, item) for item in iterable]
+        return [future.result() for future in futures]
+
+    def imap_unordered(self, function, iterable):
+        """
+        Runs the job `function` for each item and yields the results.
+
+        Results are yielded as soon as they become available, in the
+        order the jobs complete, not the order of the items. Return
+        a tuple that includes the item from the job function if the
+        item is needed to make sense of the result.
+        """
+        futures = [self.submit(function, item) for item in iterable]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def shutdown(self, wait=True):
+        """
+        Shuts down the pool.
+
+        Each worker finishes the jobs already submitted, then stops its
+        Comsol session and exits. Returns only when all workers have
+        exited, unless `wait` is `False`.
+        """
+        if not self.open:
+            return
+        self.open = False
+        log.info('Shutting down worker pool.')
+        for _ in self.processes:
+            self.jobs.put(None)
+        if wait:
+            for process in self.processes:
+                process.join()
+            self.collector.join()
+            log.info('Worker pool has shut down.')
+
+    ####################################
+    # Internal                         #
+    ####################################
+
+    def collect(self):
+        # Collects results from the workers and resolves the futures.
+        #
+        # Runs in a background thread for as long as any worker process
+        # is alive or results are still pending. Workers announce each
+        # job they start, so that the job can be failed if the worker
+        # dies before delivering the result.
+        while True:
+            try:
+                message = self.results.get(timeout=1)
+            except Empty:
+                message = None
+            self.claim()
+            self.bury()
+            if message is None:
+                if any(process.is_alive() for process in self.processes):
+                    continue
+                with self.lock:
+                    futures = list(self.futures.values())
+                    self.futures.clear()
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(
+                            RuntimeError('All pool workers have exited.'))
+                if not self.open:
+                    for receiver in self.claims:
+                        receiver.close()
+                    break
+                continue
+            (number, success, payload) = message
+            if number is None:
+                log.error(f'Worker failed to start: {payload}')
+                continue
+            with self.lock:
+                for (pid, held) in list(self.held.items()):
+                    if held == number:
+                        del self.held[pid]
+            try:
+                value = self.unshare(pickle.loads(payload))
+            except Exception as error:
+                (value, success) = (error, False)
+            with self.lock:
+                future = self.futures.pop(number, None)
+            if future is None or future.done():
+                continue
+            if success:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def claim(self):
+        # Records which job each worker process announced it has started.
+        #
+        # Workers send the announcement synchronously, before running the
+        # job, so it can be read here even if the worker died right after.
+        for (process, receiver) in zip(self.processes, self.claims):
+            try:
+                while receiver.poll():
+                    number = receiver.recv()
+                    with self.lock:
+                        self.held[process.pid] = number
+            except (EOFError, OSError):
+                continue
+
+    def bury(self):
+        # Fails the jobs held by worker processes that have died.
+        for process in self.processes:
+            if process.is_alive():
+                continue
+            with self.lock:
+                number = self.held.pop(process.pid, None)
+                future = self.futures.pop(number, None)
+            if future is not None and not future.done():
+                error = (f'Worker process {process.pid} exited with code '
+                         f'{process.exitcode} while running the job.')
+                log.error(error)
+                future.set_exception(RuntimeError(error))
+
+    def unshare(self, value):
+        # Replaces descriptors of shared arrays by the arrays themselves.
+        #
+        # Each array is backed by a memory view of its own. Views of the
+        # array refer to that same memory view, so once it is garbage-
+        # collected, no array uses the block anymore and it is released.
+        if isinstance(value, Shared):
+            block = shared_memory.SharedMemory(name=value.name)
+            memory = memoryview(block.buf)
+            finalizer = weakref.finalize(memory, free, block)
+            with self.lock:
+                self.blocks = [item for item in self.blocks if item.alive]
+                self.blocks.append(finalizer)
+            return ndarray(value.shape, value.dtype, buffer=memory)
+        if type(value) in (list, tuple):
+            return type(value)(self.unshare(item) for item in value)
+        if type(value) is dict:
+            return {key: self.unshare(item) for (key, item) in value.items()}
+        return value
+
+
+########################################
+# Worker                               #
+########################################
+
+def work(jobs, results, claims, cores, version, files, single, share):
+    """
+    Runs in each worker process, performing jobs until told to stop.
+
+    This function is not part of the public API. It starts the Comsol
+    session, preloads the model files, then calls the job functions
+    it receives via the `jobs` queue and delivers the outcome via the
+    `results` queue. The number of each job is sent over the `claims`
+    pipe before the job is run.
+    """
+    try:
+        client = start(cores=cores, version=version)
+        models = [client.load(file) for file in files]
+    except Exception:
+        results.put((None, False, traceback.format_exc()))
+        return
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        (number, payload) = job
+        claims.send(number)
+        blocks = []
+        try:
+            (function, args, kwargs) = pickle.loads(payload)
+            if not files:
+                value = function(*args, **kwargs)
+            elif single:
+                value = function(models[0], *args, **kwargs)
+            else:
+                value = function(models, *args, **kwargs)
+            if share:
+                value = place(value, share, blocks)
+            results.put((number, True, pickle.dumps(value)))
+        except Exception as error:
+            for name in blocks:
+                discard(name)
+            results.put((number, False, dump_exception(error)))
+
+
+def place(value, threshold, blocks):
+    """Places arrays larger than the threshold in shared memory."""
+    if (isinstance(value, ndarray) and value.nbytes > threshold
+            and not value.dtype.hasobject):
+        block = shared_memory.SharedMemory(create=True, size=value.nbytes)
+        blocks.append(block.name)
+        copy = ndarray(value.shape, value.dtype, buffer=block.buf)
+        copy[...] = value
+        del copy
+        block.close()
+        return Shared(block.name, value.shape, value.dtype)
+    if type(value) in (list, tuple):
+        return type(value)(place(item, threshold, blocks) for item in value)
+    if type(value) is dict:
+        return {key: place(item, threshold, blocks)
+                for (key, item) in value.items()}
+    return value
+
+
+def free(block):
+    """Releases a shared-memory block once no array uses it anymore."""
+    try:
+        block.close()
+    except Exception as error:
+        log.debug(f'Could not close shared memory "{block.name}": {error}')
+    try:
+        block.unlink()
+    except Exception as error:
+        log.debug(f'Could not unlink shared memory "{block.name}": {error}')
+
+
+def discard(name):
+    """Removes a shared-memory block that was never handed over."""
+    try:
+        block = shared_memory.SharedMemory(name=name)
+    except Exception:
+        return
+    free(block)
+
+
+def dump_exception(error):
+    """Serializes an exception, even if it cannot be pickled as is."""
+    try:
+        return pickle.dumps(error)
+    except Exception:
+        lines = traceback.format_exception(type(error), error,
+                                           error.__traceback__)
+        return pickle.dumps(RuntimeError(''.join(lines)))
@@ -13,7 +13,12 @@ from subprocess import Popen as start  # background process
 from subprocess import PIPE            # I/O redirection
 from subprocess import TimeoutExpired  # communication time-out
 from re import match as regex          # regular expression
+from re import search                  # regular-expression search
 from time import perf_counter as now   # wall-clock time
+from concurrent.futures import ThreadPoolExecutor  # parallel start-up
+from threading import Thread, Lock     # multi-threading
+from queue import Queue, Empty         # thread-safe queue
+from collections import deque          # ring buffer
 from logging import getLogger          # event logging
 
 ########################################
@@ -21,6 +26,17 @@ from logging import getLogger          # event logging
 ########################################
 log = getLogger(__package__)           # event log
 
+patterns = (                           # patterns of notable server output
+    ('license', r'license (error|failure|denied|expired|not available)'
+                r'|(could not|cannot|unable to|failed to) '
+                r'(obtain|check out|find) (a |the )?license'
+                r'|no (valid )?license'),
+    ('memory',  r'out of memory|outofmemoryerror|(not enough|insufficient)'
+                r' memory|memory allocation failed'),
+    ('error',   r'^(error|exception)\b|^\S+(exception|error):'),
+    ('warning', r'^warning\b'),
+)
+
 
 ########################################
 # Server                               #
@@ -73,10 +89,21 @@ class Server:
     A list of extra command-line `arguments` can be specified. They are
     appended to the arguments passed by default when starting the
     server process, and would thus override them in case of duplicates.
+
+    Once the server has started, a background thread keeps reading its
+    output, so that the pipe it writes to never fills up, which would
+    stall the server. Each line is logged at debug level and kept in
+    the ring buffer `output`, which holds the most recent `buffer`
+    lines. Lines reporting license failures, running out of memory,
+    warnings, or errors are also logged at warning or error level and
+    recorded in `events`. Only English server output is classified
+    this way, and only by a few specific phrases, so that routine
+    status messages stay at debug level.
     """
 
     def __init__(self, cores=None, version=None, port=None,
-                       multi=None, timeout=60, arguments=None):
+                       multi=None, timeout=60, arguments=None,
+                       buffer=1000):
 
         # Remember user-provided command-line arguments.
         extra_arguments = arguments if arguments else []
@@ -153,6 +180,13 @@ class Server:
         """Port number the server is listening on for client connections."""
         self.process = process
         """Subprocess that the server is running in."""
+        self.output = deque(lines, maxlen=buffer)
+        """Most recent lines of server output."""
+        self.events = deque(maxlen=buffer)
+        """Notable lines of server output as `(kind, line)` tuples."""
+        self.reader = Thread(target=self.pump, daemon=True)
+        """Background thread reading the server output."""
+        self.reader.start()
 
     def __repr__(self):
         return f"{self.__class__.__name__}(port={self.port})"
@@ -168,12 +202,204 @@ class Server:
             return
         log.info(f'Telling the server on port {self.port} to shut down.')
         try:
-            self.process.communicate(input='close', timeout=timeout)
+            try:
+                self.process.stdin.write('close')
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+            self.process.wait(timeout=timeout)
             log.info(f'Server on port {self.port} has stopped.')
         except TimeoutExpired:
             log.warning('Server did not shut down within time-out period.')
             log.info('Trying to forcefully terminate server process.')
             self.process.kill()
+        self.reader.join(timeout=timeout)
+
+    def pump(self):
+        # Reads the server output until the process closes the pipe.
+        #
+        # Runs in a background thread, started once the server reported
+        # its port number, which is when we stop reading the output in
+        # the calling thread.
+        for line in self.process.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            self.output.append(line)
+            log.debug(f'Server on port {self.port}: {line}')
+            kind = parse_event(line)
+            if not kind:
+                continue
+            self.events.append((kind, line))
+            if kind == 'error':
+                log.error(f'Server on port {self.port}: {line}')
+            else:
+                log.warning(f'Server on port {self.port}: {line}')
+
+
+########################################
+# Servers                              #
+########################################
+
+class Servers:
+    """
+    Keeps a pool of idle Comsol servers ready to be handed out.
+
+    Starting a Comsol server takes a while, typically tens of seconds.
+    Instances of this class start a number of servers, given by
+    `count`, all at the same time, and wait for them to report their
+    port numbers in parallel. The servers run with `multi='on'`, so
+    that they stay alive when clients disconnect, and listen on random
+    free ports to avoid collisions. Other arguments are passed on to
+    [`Server`](#Server) as is.
+
+    Example usage:
+    ```python
+    import mph
+    with mph.Servers(4, cores=1) as servers:
+        server = servers.acquire()
+        client = mph.Client(port=server.port)
+        ...
+        client.disconnect()
+        servers.release(server)
+    ```
+
+    Servers are handed out by `acquire()` and handed back by
+    `release()`. If `refill` is `True`, the default, a replacement
+    server is started in the background whenever one is handed out,
+    so that `count` servers are kept warm at all times.
+
+    Servers that failed to start are left out of the pool. If none of
+    them started, `RuntimeError` is raised.
+    """
+
+    def __init__(self, count, cores=None, version=None, timeout=60,
+                       arguments=None, refill=True):
+        self.count = count
+        """Number of idle servers to keep ready."""
+        self.cores = cores
+        self.version = version
+        self.timeout = timeout
+        self.arguments = arguments
+        self.refill = refill
+        self.idle = Queue()
+        """Queue of idle servers waiting to be handed out."""
+        self.servers = []
+        """All servers started and not yet stopped."""
+        self.lock = Lock()
+        self.open = True
+        log.info(f'Starting {count} servers concurrently.')
+        t0 = now()
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(self.spawn) for _ in range(count)]
+        failed = [future for future in futures if future.exception()]
+        if len(failed) == count:
+            error = f'No server started: {failed[0].exception()}'
+            log.error(error)
+            raise RuntimeError(error)
+        if failed:
+            log.warning(f'{len(failed)} of {count} servers failed to start.')
+        log.info(f'Servers started in {now()-t0:.1f} seconds.')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.stop()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(count={self.count})'
+
+    def acquire(self, timeout=None):
+        """
+        Hands out an idle server.
+
+        Waits for a server to become available if none is idle. Raises
+        `TimeoutError` if that takes longer than `timeout` seconds.
+        """
+        if not self.open:
+            error = 'Cannot acquire servers from a pool that was stopped.'
+            log.error(error)
+            raise RuntimeError(error)
+        t0 = now()
+        while True:
+            remaining = None
+            if timeout is not None:
+                remaining = max(0, timeout - (now() - t0))
+            try:
+                server = self.idle.get(timeout=remaining)
+            except Empty:
+                error = 'No idle server became available within time-out.'
+                log.error(error)
+                raise TimeoutError(error) from None
+            if server.running():
+                break
+            log.warning(f'Idle server on port {server.port} has stopped.')
+            self.discard(server)
+            if self.refill:
+                self.replenish()
+        if self.refill:
+            self.replenish()
+        return server
+
+    def release(self, server):
+        """
+        Hands a server back to the pool.
+
+        Clients should disconnect from the server first. The server is
+        stopped instead if enough idle servers are already waiting.
+        """
+        if self.open and server.running() and self.idle.qsize() < self.count:
+            self.idle.put(server)
+        else:
+            self.discard(server)
+
+    def stop(self):
+        """Stops all servers, whether idle or handed out."""
+        with self.lock:
+            self.open = False
+            (servers, self.servers) = (self.servers, [])
+        servers = [server for server in servers if server.running()]
+        if not servers:
+            return
+        log.info(f'Stopping {len(servers)} servers.')
+        with ThreadPoolExecutor(max_workers=len(servers)) as executor:
+            executor.map(Server.stop, servers)
+
+    ####################################
+    # Internal                         #
+    ####################################
+
+    def spawn(self):
+        # Starts a server and adds it to the pool of idle servers.
+        server = Server(cores=self.cores, version=self.version, port=0,
+                        multi=True, timeout=self.timeout,
+                        arguments=self.arguments)
+        with self.lock:
+            accepted = self.open
+            if accepted:
+                self.servers.append(server)
+        if not accepted:
+            server.stop()
+            return
+        self.idle.put(server)
+
+    def replenish(self):
+        # Starts a replacement server in the background.
+        def target():
+            try:
+                self.spawn()
+            except Exception as error:
+                log.error(f'Replacement server failed to start: {error}')
+        Thread(target=target, daemon=True).start()
+
+    def discard(self, server):
+        # Stops the server and removes it from the pool.
+        with self.lock:
+            if server in self.servers:
+                self.servers.remove(server)
+        if server.running():
+            server.stop()
 
 
 ########################################
@@ -188,3 +414,12 @@ def parse_port(line):
         return port
     else:
         return None
+
+
+def parse_event(line):
+    """Classifies a line of server output as a notable event, or not."""
+    lower = line.lower()
+    for (kind, pattern) in patterns:
+        if search(pattern, lower):
+            return kind
+    return None
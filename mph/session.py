@@ -6,6 +6,8 @@
 from .client import Client             # client class
 from .server import Server             # server class
 from .config import option             # configuration
+from .model import Model               # model class
+from .node import Node                 # model node
 
 ########################################
 # Dependencies                         #
@@ -16,6 +18,11 @@ import sys                             # system specifics
 import platform                        # platform information
 import threading                       # multi-threading
 import faulthandler                    # traceback dumps
+import operator                        # standard operators
+from concurrent.futures import ThreadPoolExecutor  # worker thread
+from collections.abc import Iterator   # iterator type
+from functools import partial          # partial function
+from numpy import array                # numerical array
 from logging import getLogger          # event logging
 
 ########################################
@@ -24,6 +31,8 @@ from logging import getLogger          # event logging
 client = None                          # client instance
 server = None                          # server instance
 thread = None                          # current thread
+executor = None                        # dedicated Comsol thread
+comsol = None                          # thread the client runs in
 system = platform.system()             # operating system
 log    = getLogger(__package__)        # event log
 
@@ -75,9 +84,37 @@ def start(cores=None, version=None, port=0):
 
     The server `port` can be specified if client–server mode is used.
     If omitted, the server chooses a random free port.
+
+    The client may only be accessed from the thread that started it,
+    as the Comsol API is not thread-safe. If the configuration option
+    `'executor'` is set to `True` before calling this function, all
+    calls into the Comsol API are instead carried out by a dedicated
+    thread, one at a time. The returned client is then a
+    [`Proxy`](#Proxy) that forwards method calls to that thread,
+    and so are the models and nodes returned by it. This lets any
+    thread work with the client. Use [`submit()`](#submit) to queue
+    up work for the Comsol thread without waiting for the result.
     """
-    global client, server, thread
+    global client, server, thread, executor
+
+    if option('executor'):
+        if thread:
+            error = 'Client was already started without dedicated thread.'
+            log.error(error)
+            raise RuntimeError(error)
+        if not executor:
+            executor = ThreadPoolExecutor(max_workers=1,
+                                          thread_name_prefix='Comsol')
+        if client:
+            log.info('mph.start() returning the existing client instance.')
+        else:
+            executor.submit(launch, cores, version, port).result()
+        return Proxy(client)
 
+    if executor:
+        error = 'Client was already started in dedicated thread.'
+        log.error(error)
+        raise RuntimeError(error)
     if not thread:
         thread = threading.current_thread()
     elif thread is not threading.current_thread():
@@ -88,6 +125,12 @@ def start(cores=None, version=None, port=0):
     if client:
         log.info('mph.start() returning the existing client instance.')
         return client
+    return launch(cores, version, port)
+
+
+def launch(cores, version, port):
+    """Starts the client, and the server if required by session type."""
+    global client, server, comsol
 
     session = option('session')
     if session == 'platform-dependent':
@@ -106,9 +149,180 @@ def start(cores=None, version=None, port=0):
         error = f'Invalid session type "{session}".'
         log.error(error)
         raise ValueError(error)
+    comsol = threading.current_thread()
     return client
 
 
+########################################
+# Executor                             #
+########################################
+
+def submit(function, *args, **kwargs):
+    """
+    Submits work to the dedicated Comsol thread.
+
+    Requires that the session was started with the configuration
+    option `'executor'` turned on, see [`start()`](#start). Calls
+    `function` with the given positional and keyword arguments on
+    the Comsol thread and returns a [`Future`][1] right away, without
+    waiting for the call to finish. Arguments that are proxies are
+    passed on as the objects they stand in for, and the result is
+    wrapped in a proxy if need be.
+
+    Example usage:
+    ```python
+    import mph
+    mph.option('executor', True)
+    client = mph.start()
+    model = client.load('model.mph')
+    future = mph.submit(model.solve)
+    # Do something else in the meantime.
+    future.result()
+    ```
+
+    [1]: https://docs.python.org/3/library/\
+concurrent.futures.html#future-objects
+    """
+    if not executor:
+        error = 'No dedicated Comsol thread has been started.'
+        log.error(error)
+        raise RuntimeError(error)
+    return executor.submit(run, function, args, kwargs)
+
+
+def call(function, *args, **kwargs):
+    """Calls the function on the Comsol thread and waits for the result."""
+    if threading.current_thread() is comsol:
+        return run(function, args, kwargs)
+    return submit(function, *args, **kwargs).result()
+
+
+def run(function, args, kwargs):
+    """Calls the function with the proxies among its arguments unwrapped."""
+    return wrap(function(*unwrap(args), **unwrap(kwargs)))
+
+
+def wrap(value):
+    """Wraps objects that live on the Comsol thread in proxies."""
+    if isinstance(value, (Client, Model, Node, jpype.JObject)):
+        return Proxy(value)
+    if type(value) in (list, tuple):
+        return type(value)(wrap(item) for item in value)
+    if type(value) is dict:
+        return {key: wrap(item) for (key, item) in value.items()}
+    if isinstance(value, Iterator):
+        return stream(value)
+    return value
+
+
+def unwrap(value):
+    """Replaces proxies by the objects they stand in for."""
+    if isinstance(value, Proxy):
+        return object.__getattribute__(value, 'target')
+    if type(value) in (list, tuple):
+        return type(value)(unwrap(item) for item in value)
+    if type(value) is dict:
+        return {key: unwrap(item) for (key, item) in value.items()}
+    return value
+
+
+def stream(iterator):
+    """Yields the iterator's items, advancing it on the Comsol thread."""
+    end = object()
+    while True:
+        item = call(next, iterator, end)
+        if item is end:
+            return
+        yield item
+
+
+class Proxy:
+    """
+    Stands in for an object that lives on the dedicated Comsol thread.
+
+    Proxies are returned by [`start()`](#start) if the configuration
+    option `'executor'` is turned on. They wrap the client, as well as
+    the models and nodes, or any Java objects, obtained from it. Any
+    attribute access, method call, or operation on the proxy is
+    forwarded to the Comsol thread and blocks until it has been
+    carried out there. Results are in turn wrapped in proxies where
+    necessary, while plain values, such as strings or NumPy arrays,
+    are returned as is.
+
+    Proxies support attribute access, method calls, comparison, the
+    division operator for model nodes, iteration, membership tests,
+    `len()`, indexing, truth tests, and conversion to NumPy arrays,
+    for example of Java arrays. They are not instances of the class
+    they stand in for. Use [`submit()`](#submit) to call a method
+    without waiting for it to return.
+    """
+
+    def __init__(self, target):
+        object.__setattr__(self, 'target', target)
+
+    def __getattr__(self, name):
+        target = object.__getattribute__(self, 'target')
+        value = call(getattr, target, name)
+        if callable(value) and not isinstance(value, Proxy):
+            return partial(call, value)
+        return value
+
+    def __setattr__(self, name, value):
+        target = object.__getattribute__(self, 'target')
+        call(setattr, target, name, value)
+
+    def __repr__(self):
+        target = object.__getattribute__(self, 'target')
+        return f'Proxy({call(repr, target)})'
+
+    def __str__(self):
+        return call(str, object.__getattribute__(self, 'target'))
+
+    def __eq__(self, other):
+        target = object.__getattribute__(self, 'target')
+        return call(operator.eq, target, other)
+
+    def __ne__(self, other):
+        target = object.__getattribute__(self, 'target')
+        return call(operator.ne, target, other)
+
+    def __hash__(self):
+        return call(hash, object.__getattribute__(self, 'target'))
+
+    def __truediv__(self, other):
+        target = object.__getattribute__(self, 'target')
+        return call(operator.truediv, target, other)
+
+    def __contains__(self, item):
+        target = object.__getattribute__(self, 'target')
+        return call(operator.contains, target, item)
+
+    def __iter__(self):
+        return call(iter, object.__getattribute__(self, 'target'))
+
+    def __len__(self):
+        return call(len, object.__getattribute__(self, 'target'))
+
+    def __bool__(self):
+        return call(bool, object.__getattribute__(self, 'target'))
+
+    def __getitem__(self, key):
+        target = object.__getattribute__(self, 'target')
+        return call(operator.getitem, target, key)
+
+    def __setitem__(self, key, value):
+        target = object.__getattribute__(self, 'target')
+        call(operator.setitem, target, key, value)
+
+    def __array__(self, dtype=None, copy=None):
+        target = object.__getattribute__(self, 'target')
+        return call(array, target, dtype)
+
+    def __call__(self, *args, **kwargs):
+        target = object.__getattribute__(self, 'target')
+        return call(target, *args, **kwargs)
+
+
 ########################################
 # Stop                                 #
 ########################################
@@ -151,7 +365,10 @@ def cleanup():
     """
     if client and client.port:
         try:
-            client.disconnect()
+            if executor and comsol.is_alive():
+                executor.submit(client.disconnect).result()
+            else:
+                client.disconnect()
         except Exception:
             error = 'Error while disconnecting client at session clean-up.'
             log.exception(error)
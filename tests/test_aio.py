@@ -0,0 +1,109 @@
+﻿"""Tests the `aio` module with a dedicated Comsol thread."""
+
+########################################
+# Dependencies                         #
+########################################
+import mph
+from fixtures import logging_disabled
+from fixtures import setup_logging
+from pytest import raises
+from pathlib import Path
+from threading import Thread
+import asyncio
+
+
+########################################
+# Fixtures                             #
+########################################
+demo   = Path(__file__).resolve().parent/'demo.mph'
+client = None
+model  = None
+
+
+def setup_module():
+    global client
+    mph.option('executor', True)
+    client = mph.start(cores=1)
+
+
+def teardown_module():
+    mph.option('executor', False)
+
+
+########################################
+# Tests                                #
+########################################
+
+def test_executor():
+    assert isinstance(client, mph.Proxy)
+    assert client.cores == 1
+    names = []
+    thread = Thread(target=lambda: names.append(client.names()))
+    thread.start()
+    thread.join()
+    assert names == [client.names()]
+    assert mph.submit(client.names).result() == client.names()
+
+
+def test_load():
+    global model
+    model = asyncio.run(mph.aio.load(client, demo))
+    assert isinstance(model, mph.Proxy)
+    assert model.name() == 'demo'
+    assert 'demo' in client.names()
+    names = model.java.param().varnames()
+    assert isinstance(names, mph.Proxy)
+    assert names
+    assert len(names) == len(model.parameters())
+    assert str(names[0]) in model.parameters()
+
+
+def test_mesh():
+    asyncio.run(mph.aio.mesh(model, force=True))
+    assert (model/'meshes').children()
+
+
+def test_solve():
+    asyncio.run(mph.aio.solve(model, 'static', force=True))
+    assert model.evaluate('2*es.intWe/U^2', 'pF') > 0
+
+
+def test_timeout():
+    with logging_disabled(), raises(asyncio.TimeoutError):
+        asyncio.run(mph.aio.solve(model, force=True, timeout=0))
+
+
+def test_no_executor():
+    executor = mph.session.executor
+    mph.session.executor = None
+    try:
+        with logging_disabled(), raises(RuntimeError):
+            asyncio.run(mph.aio.solve(model))
+    finally:
+        mph.session.executor = executor
+
+
+def test_save():
+    file = Path(__file__).resolve().parent/'aio.mph'
+    asyncio.run(mph.aio.save(model, file))
+    assert file.exists()
+    file.unlink()
+
+
+########################################
+# Main                                 #
+########################################
+
+if __name__ == '__main__':
+    setup_logging()
+    setup_module()
+    try:
+        test_executor()
+        test_load()
+        test_mesh()
+        test_solve()
+        test_timeout()
+        test_no_executor()
+        test_save()
+    finally:
+        teardown_module()
@@ -29,6 +29,24 @@ def test_backend():
     assert backend['server']
 
 
+def test_cache():
+    backends = mph.discovery.find_backends()
+    versions = mph.discovery.load_versions()
+    for backend in backends:
+        cached = versions[str(backend['server'][0])]
+        (name, *_) = mph.discovery.parse(cached['version'])
+        assert name == backend['name']
+    file = mph.discovery.cache_file()
+    text = file.read_text(encoding='UTF-8')
+    try:
+        file.write_text(text[:len(text)//2], encoding='UTF-8')
+        assert mph.discovery.load_versions() == {}
+        mph.discovery.save_versions(versions)
+        assert mph.discovery.load_versions() == versions
+    finally:
+        file.write_text(text, encoding='UTF-8')
+
+
 ########################################
 # Main                                 #
 ########################################
@@ -37,3 +55,4 @@ if __name__ == '__main__':
     setup_logging()
     test_parse()
     test_backend()
+    test_cache()
@@ -9,6 +9,8 @@ from fixtures import logging_disabled
 from fixtures import warnings_disabled
 from fixtures import setup_logging
 from numpy import isclose
+from numpy import array
+from numpy import load
 from numpy.testing import assert_allclose
 from pytest import raises
 from pathlib import Path
@@ -41,7 +43,8 @@ def teardown_module():
              here/'mesh.mphbin', here/'mesh.mphtxt',
              here/'animation.gif', here/'animation.swf',
              here/'animation.avi', here/'animation.webm',
-             here/'frame1.png', here/'frame2.png', here/'frame3.png')
+             here/'frame1.png', here/'frame2.png', here/'frame3.png',
+             here/'normD.npy', here/'normE.npy')
     for file in files:
         if file.exists():
             file.unlink()
@@ -184,10 +187,46 @@ def test_modules():
         assert value in mph.client.modules.values()
 
 
+def test_snapshot():
+    snapshot = model.snapshot()
+    assert snapshot.name == 'capacitor'
+    assert [child.name for child in snapshot.children] == \
+           [node.name() for node in model]
+    assert (snapshot/'functions/step').tag == 'step1'
+    assert (snapshot/'datasets/sweep//solution').name == 'sweep/solution'
+
+
 def test_build():
     model.build()
     model.build('geometry')
     model.build(model/'geometries'/'geometry')
+    geometry = model/'geometries'/'geometry'
+    names = model.sequence_dependencies(geometry)
+    assert {'d', 'w', 'l'} <= names
+    assert 'U' not in names
+    builds = model.state['builds']
+    model.build()
+    assert model.state['builds'] == builds
+    model.parameter('U', '2[V]')
+    model.build()
+    assert model.state['builds'] == builds
+    model.parameter('U', '1[V]')
+    d = model.parameter('d')
+    model.parameter('d', '3[mm]')
+    model.build()
+    assert model.state['builds'] == builds + 1
+    model.parameter('d', d)
+    model.build()
+    assert model.state['builds'] == builds + 2
+    model.build(force=True)
+    assert model.state['builds'] == builds + 3
+    step = model/'functions'/'step'
+    step.property('funcname', step.property('funcname'))
+    model.build()
+    assert model.state['builds'] == builds + 4
+    model.solve('static')
+    model.build()
+    assert model.state['builds'] == builds + 5
     with logging_disabled():
         with raises(ValueError):
             model.build(model/'function'/'step')
@@ -203,6 +242,19 @@ def test_mesh():
     model.mesh()
     model.mesh('mesh')
     model.mesh(model/'meshes'/'mesh')
+    version = model.cache_info()['version']
+    model.mesh()
+    assert model.cache_info()['version'] == version
+    model.build(force=True)
+    model.mesh()
+    assert model.cache_info()['version'] == version + 2
+    model.mesh(force=True)
+    assert model.cache_info()['version'] == version + 3
+    anode = model/'physics'/'electrostatic'/'anode'
+    anode.property('V0', anode.property('V0'))
+    version = model.cache_info()['version']
+    model.mesh()
+    assert model.cache_info()['version'] == version + 1
     with logging_disabled():
         with raises(ValueError):
             model.mesh(model/'function'/'step')
@@ -218,6 +270,20 @@ def test_solve():
     model.solve()
     model.solve('static')
     model.solve(model/'studies'/'static')
+    version = model.cache_info()['version']
+    model.solve('static')
+    assert model.cache_info()['version'] > version
+    mph.option('solvecache', True)
+    version = model.cache_info()['version']
+    model.solve('static')
+    assert model.cache_info()['version'] == version
+    model.solve('static', force=True)
+    assert model.cache_info()['version'] > version
+    version = model.cache_info()['version']
+    model.parameter('U', model.parameter('U'))
+    model.solve('static')
+    assert model.cache_info()['version'] > version + 1
+    mph.option('solvecache', False)
     with logging_disabled():
         with raises(ValueError):
             model.solve(model/'function'/'step')
@@ -238,6 +304,8 @@ def test_inner():
     assert values[-1] == 1
     assert model.inner(model/'datasets'/'time-dependent')
     assert model.inner('sweep//solution')
+    assert (model/'datasets'/'time-dependent').path in model.sources
+    assert model.inner()
     with logging_disabled():
         with raises(ValueError):
             model.inner('non-existing')
@@ -248,6 +316,7 @@ def test_inner():
         with raises(RuntimeError):
             model.inner(no_solution)
         no_solution.remove()
+    assert no_solution.path not in model.sources
 
 
 def test_outer():
@@ -258,6 +327,11 @@ def test_outer():
     assert (values == (1.0, 2.0, 3.0)).all()
     assert model.outer(model/'datasets'/'parametric sweep')
     assert model.outer('sweep//solution')
+    (indices, table, names) = model.outer('parametric sweep', names=True)
+    assert (indices == list(range(1,4))).all()
+    assert table.shape == (3, 1)
+    assert (table[:, 0] == (1.0, 2.0, 3.0)).all()
+    assert names == ['d']
     with logging_disabled():
         with raises(ValueError):
             model.outer('non-existing')
@@ -274,6 +348,8 @@ def test_evaluate():
     # Test global evaluation of stationary solution.
     C = model.evaluate('2*es.intWe/U^2', 'pF')
     assert isclose(C, 0.73678541)
+    assert 'EvalGlobal' in model.pool
+    assert isclose(model.evaluate('2*es.intWe/U^2', 'pF'), C)
     # Test field evaluation of stationary solution.
     (x, y, E) = model.evaluate(['x', 'y', 'es.normE'], ['mm', 'mm', 'V/m'])
     (Emax, xmax, ymax) = (E.max(), x[E.argmax()], y[E.argmax()])
@@ -304,6 +380,8 @@ def test_evaluate():
     D = model.evaluate(expression, unit, dataset, inner=[1, 101])
     assert_allclose(D[0], D_first)
     assert_allclose(D[1], D_last)
+    D = model.evaluate(expression, unit, dataset, inner=array([101]))
+    assert_allclose(D, D_last)
     # Test global evaluation of parameter sweep.
     (dataset, expression, unit) = ('parametric sweep', '2*ec.intWe/U^2', 'pF')
     C1 = model.evaluate(expression, unit, dataset, 'first', 1)
@@ -388,6 +466,139 @@ def test_evaluate():
         assert (z.imag == qy).all()
 
 
+def test_evaluate_steps():
+    (dataset, expression, unit) = ('time-dependent', 'ec.normD', 'nC/m^2')
+    D = model.evaluate(expression, unit, dataset)
+    steps = model.evaluate_steps(expression, unit, dataset)
+    for (step, (indices, D_step)) in enumerate(steps):
+        assert indices == [step + 1]
+        assert_allclose(D_step, D[step])
+    assert step == 100
+    steps = list(model.evaluate_steps(expression, unit, dataset, chunk=40))
+    assert len(steps) == 3
+    (indices, D_chunk) = steps[-1]
+    assert (indices == list(range(81, 102))).all()
+    assert_allclose(D_chunk, D[80:])
+    (indices, D_last) = next(model.evaluate_steps(expression, unit, dataset,
+                                                  inner='last'))
+    assert indices == [101]
+    assert_allclose(D_last, D[-1])
+    steps = model.evaluate_steps(expression, unit, dataset, chunk=50)
+    for (indices, D_chunk) in steps:
+        model.evaluate('ec.normE', 'V/m', 'electrostatic')
+        assert_allclose(D_chunk, D[indices[0]-1:indices[-1]])
+    with logging_disabled():
+        with raises(ValueError):
+            next(model.evaluate_steps(expression, unit, dataset, chunk=0))
+
+
+def test_evaluate_file():
+    here = Path(__file__).resolve().parent
+    (dataset, expression, unit) = ('time-dependent', 'ec.normD', 'nC/m^2')
+    D = model.evaluate(expression, unit, dataset)
+    D_file = model.evaluate_file(expression, here/'normD.npy', unit, dataset,
+                                 chunk=30)
+    assert D_file.shape == D.shape
+    assert_allclose(D_file, D)
+    del D_file
+    assert_allclose(load(here/'normD.npy'), D)
+    D_last = model.evaluate_file(expression, here/'normD.npy', unit, dataset,
+                                 inner='last')
+    assert D_last.shape == (1, D.shape[1])
+    assert_allclose(D_last[0], D[-1])
+    del D_last
+    expressions = ['ec.normD', 'ec.normE']
+    files = [here/'normD.npy', here/'normE.npy']
+    (D_file, E_file) = model.evaluate_file(expressions, files,
+                                           dataset=dataset, inner=[1, 101])
+    assert D_file.shape == E_file.shape == (2, D.shape[1])
+    del D_file, E_file
+    with logging_disabled():
+        with raises(ValueError):
+            model.evaluate_file(expressions, here/'normD.npy')
+
+
+def test_evaluate_batch():
+    results = model.evaluate_batch([
+        ('2*es.intWe/U^2', 'pF'),
+        ('U', 'V'),
+        ('2*ec.intWe/U^2', 'pF', 'time-dependent', 'last'),
+        ('es.normE', 'V/m'),
+    ])
+    assert isclose(results['2*es.intWe/U^2'], 0.73678541)
+    assert isclose(results['U'], model.evaluate('U', 'V'))
+    assert isclose(results['2*ec.intWe/U^2'], 0.82870712)
+    assert isclose(results['es.normE'].max(), 818.24912)
+    results = model.evaluate_batch({'C': ('2*es.intWe/U^2', 'pF')})
+    assert isclose(results['C'], 0.73678541)
+    with logging_disabled():
+        with raises(ValueError):
+            model.evaluate_batch([()])
+        with raises(ValueError):
+            model.evaluate_batch([('U', 'V'), ('U', 'mV')])
+        with raises(TypeError):
+            model.evaluate_batch([('U', None, False)])
+
+
+def test_cache_info():
+    mph.option('evalcache', 2)
+    (expression, unit) = ('2*es.intWe/U^2', 'pF')
+    info = model.cache_info()
+    assert info['size'] == 0
+    assert info['maxsize'] == 2
+    C1 = model.evaluate(expression, unit)
+    C2 = model.evaluate(expression, unit)
+    assert C1 == C2
+    info = model.cache_info()
+    assert info['hits'] == 1
+    assert info['misses'] == 1
+    assert info['size'] == 1
+    model.parameter('U', model.parameter('U'))
+    assert model.cache_info()['version'] > info['version']
+    model.evaluate(expression, unit)
+    assert model.cache_info()['misses'] == 2
+    model.evaluate(expression, 'F')
+    model.evaluate('U')
+    assert model.cache_info()['size'] == 2
+    mph.option('evalcache', 0)
+
+
+def test_sweep():
+    grid = {'d': ['1[mm]', '2[mm]', '3[mm]']}
+    (expression, unit) = ('2*es.intWe/U^2', 'pF')
+    d = model.parameter('d')
+    datasets = model.datasets()
+    solutions = model.solutions()
+    native = model.sweep(grid, 'static', [expression], [unit])
+    assert native.shape == (3,)
+    assert list(native['d']) == grid['d']
+    C = native[expression]
+    assert C[0] > C[1] > C[2]
+    assert model.parameter('d') == d
+    assert 'sweep' not in (model/'studies'/'static')
+    assert model.datasets() == datasets
+    assert model.solutions() == solutions
+    loop = model.sweep(grid, 'static', [expression], [unit],
+                       dataset='electrostatic', native=False)
+    assert_allclose(loop[expression], C)
+    assert model.parameter('d') == d
+    loop = model.sweep(grid, 'static', [expression], [unit],
+                       dataset='electrostatic')
+    assert_allclose(loop[expression], C)
+    assert model.datasets() == datasets
+    with logging_disabled():
+        with raises(TypeError):
+            model.sweep([1, 2, 3])
+        with raises(ValueError):
+            model.sweep(grid, 'static', [expression], [unit, unit])
+        with raises(ValueError):
+            model.sweep(grid, 'static', ['d'])
+        with raises(ValueError):
+            model.sweep(grid, 'static', [expression, expression])
+        with raises(LookupError):
+            model.sweep({'non-existing': [1, 2]}, 'static')
+
+
 def test_rename():
     name = model.name()
     model.rename('test')
@@ -428,6 +639,27 @@ def test_parameters():
     assert '1[V]' in model.parameters().values()
     assert ('U', '1[V]') in model.parameters().items()
     assert ('U', 1) in model.parameters(evaluate=True).items()
+    assert ('U', 1) in model.parameters(True).items()
+    values = model.parameters()
+    model.parameters({'U': '2[V]', 'd': 3})
+    assert model.parameter('U') == '2[V]'
+    assert model.parameter('d') == '3'
+    model.parameters({'U': 1+1j})
+    assert model.parameter('U', evaluate=True) == 1+1j
+    model.parameters(values)
+    assert model.parameters() == values
+
+
+def test_parameter_table():
+    table = model.parameter_table()
+    assert list(table) == list(model.parameters())
+    assert table['U']['value'] == '1[V]'
+    assert table['U']['number'] == 1
+    assert table['U']['unit'] == 'V'
+    assert table['U']['description'] == 'applied voltage'
+    model.parameter('U', 1+1j)
+    assert model.parameter_table()['U']['number'] == 1+1j
+    model.parameter('U', '1[V]')
 
 
 def test_description():
@@ -662,16 +894,27 @@ def test_export():
 
 
 def test_clear():
+    evaluations = (model/'evaluations').children()
+    model.evaluate('U')
+    assert model.pool
     model.clear()
+    assert not model.pool
+    assert (model/'evaluations').children() == evaluations
 
 
 def test_reset():
+    evaluations = (model/'evaluations').children()
+    model.evaluation_feature('EvalGlobal')
+    assert model.pool
     model.reset()
+    assert not model.pool
+    assert (model/'evaluations').children() == evaluations
 
 
 def test_save():
     here = Path(__file__).resolve().parent
     model.save()
+    assert not model.pool
     empty.save(format='java')
     assert Path(f'{model}.mph').exists()
     assert Path(f'{empty}.java').exists()
@@ -738,7 +981,9 @@ def test_toggle():
     with warnings_disabled():
         model.solve('static')
         assert abs(model.evaluate('V_es').mean()) < 0.1
+        inputs = model.state['inputs']
         model.toggle('electrostatic', 'cathode')
+        assert model.state['inputs'] > inputs
         model.solve('static')
         assert abs(model.evaluate('V_es').mean() - 0.5) < 0.1
         model.toggle('electrostatic', 'cathode', 'on')
@@ -764,7 +1009,9 @@ def test_load():
         image.property('ymin', -5)
         image.property('ymax', +5)
         image.property('extrap', 'value')
+        inputs = model.state['inputs']
         model.load('gaussian.tif', 'image')
+        assert model.state['inputs'] > inputs
         model.remove('functions/image')
         with logging_disabled():
             with raises(LookupError):
@@ -804,6 +1051,7 @@ if __name__ == '__main__':
         test_plots()
         test_exports()
         test_modules()
+        test_snapshot()
 
         test_build()
         test_mesh()
@@ -812,10 +1060,16 @@ if __name__ == '__main__':
         test_inner()
         test_outer()
         test_evaluate()
+        test_evaluate_steps()
+        test_evaluate_file()
+        test_evaluate_batch()
+        test_cache_info()
+        test_sweep()
 
         test_rename()
         test_parameter()
         test_parameters()
+        test_parameter_table()
         test_description()
         test_descriptions()
         test_property()
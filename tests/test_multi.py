@@ -55,6 +55,21 @@ def test_multi():
     server.stop()
 
 
+def test_servers():
+    with mph.Servers(2, cores=1, refill=False) as servers:
+        assert repr(servers) == 'Servers(count=2)'
+        first = servers.acquire()
+        second = servers.acquire()
+        assert first.running() and second.running()
+        assert first.port != second.port
+        with logging_disabled(), raises(TimeoutError):
+            servers.acquire(timeout=0)
+        servers.release(first)
+        assert servers.acquire(timeout=1) is first
+    assert not first.running()
+    assert not second.running()
+
+
 ########################################
 # Main                                 #
 ########################################
@@ -63,5 +78,6 @@ if __name__ == '__main__':
     setup_logging()
     try:
         test_multi()
+        test_servers()
     finally:
         teardown_module()
@@ -80,6 +80,15 @@ def test_iter():
 def test_java():
     assert Node(model, 'functions').java
     assert Node(model, 'functions/step').java
+    assert ('functions', 'step') in model.resolved
+    mph.option('nodecache', False)
+    node = Node(model, 'functions/step')
+    assert node.java
+    assert node.tags == (None, 'step1')
+    assert node.java
+    assert (node.parent()/'step').tags == node.tags
+    assert not Node(model, 'functions/non-existing').java
+    mph.option('nodecache', True)
 
 
 def test_name():
@@ -138,6 +147,24 @@ def test_exists():
     assert not Node(model, 'functions/new').exists()
 
 
+def test_snapshot():
+    snapshot = Node(model, 'functions').snapshot()
+    assert snapshot.name == 'functions'
+    assert (snapshot/'step').tag == 'step1'
+    assert (snapshot/'step').type == 'Step'
+    assert (snapshot/'step').active
+    assert (snapshot/'step').properties is None
+    assert [path for (path, _) in snapshot.walk()][:2] == ['', 'step']
+    snapshot = Node(model, 'functions/step').snapshot(properties=True)
+    assert snapshot.properties['funcname'] == 'step'
+    assert snapshot.serialize()['properties']['funcname'] == 'step'
+    with logging_disabled():
+        with raises(LookupError):
+            snapshot/'non-existing'
+        with raises(LookupError):
+            Node(model, 'functions/non-existing').snapshot()
+
+
 def test_comment():
     node = Node(model, 'datasets/sweep//solution')
     assert node.exists()
@@ -257,6 +284,7 @@ def test_rename():
     renamed = Node(model, 'functions/renamed')
     assert not renamed.exists()
     node.rename('renamed')
+    assert ('functions', name) not in model.resolved
     assert node.exists()
     assert renamed.exists()
     node.rename(name)
@@ -417,6 +445,15 @@ def test_properties():
     assert 'funcname' in function.properties().keys()
     assert 'step' in function.properties().values()
     assert ('funcname', 'step') in function.properties().items()
+    mph.option('propcache', True)
+    assert function.properties()['funcname'] == 'step'
+    assert function.path in model.values
+    function.property('funcname', 'cached')
+    assert function.path not in model.values
+    assert function.property('funcname') == 'cached'
+    function.property('funcname', 'step')
+    assert function.properties()['funcname'] == 'step'
+    mph.option('propcache', False)
 
 
 def test_select():
@@ -603,6 +640,9 @@ def test_tag_pattern():
     assert node.tag_pattern(['functions', 'Step'])    == 'step*'
     assert node.tag_pattern(['non-existing', 'Step']) == 'ste*'
     assert node.tag_pattern(['non-existing', '?'])    == 'tag*'
+    assert node.tag_pattern(['functions', 'Stepp'])   == 'ste*'
+    assert node.closest_pattern('functions → Stepp', 'functions', 'Step') \
+           == 'step*'
 
 
 def test_cast():
@@ -610,6 +650,10 @@ def test_cast():
     bool_array_2d = array([[True, False], [False, True]])
     assert node.cast(bool_array_1d).__class__.__name__ == 'boolean[]'
     assert node.cast(bool_array_2d).__class__.__name__ == 'boolean[][]'
+    assert node.cast([1, 2]).__class__.__name__ == 'int[]'
+    assert node.cast([[1.0, 2.0]]).__class__.__name__ == 'double[][]'
+    assert node.cast([[1.0], [2.0, 3.0]]).__class__.__name__ == 'double[][]'
+    assert list(node.cast(array([[1, 2], [3, 4]]).T)[0]) == [1, 3]
     with logging_disabled():
         with raises(TypeError):
             array3d = array([[[1,2], [3,4]], [[5,6], [7,8]]], dtype=object)
@@ -619,10 +663,22 @@ def test_cast():
             node.cast(three_rows)
         with raises(TypeError):
             node.cast(array([1+1j, 1-1j]))
+        with raises(ValueError):
+            node.cast(array([2**31]))
+        with raises(ValueError):
+            node.cast([[1, 2], [3, -2**31-1]])
         with raises(TypeError):
             node.cast({1, 2, 3})
 
 
+def test_read():
+    java = Node(model, 'functions/step').java
+    assert node.read(java, ['funcname']) == {'funcname': 'step'}
+    values = node.read(java, ['funcname', 'location'])
+    assert values['funcname'] == 'step'
+    assert values['location'] == node.get(java, 'location')
+
+
 def test_get():
     pass
 
@@ -655,6 +711,9 @@ def test_tree():
         └─ exports
     '''
     assert output.text().strip() == dedent(expected).strip()
+    with capture_stdout() as output:
+        mph.tree(model.snapshot(), max_depth=1)
+    assert output.text().strip() == dedent(expected).strip()
     with capture_stdout() as output:
         mph.tree(model/'materials')
     expected = '''
@@ -700,6 +759,7 @@ if __name__ == '__main__':
     test_is_group()
     test_exists()
 
+    test_snapshot()
     test_comment()
     test_problems()
 
@@ -724,6 +784,7 @@ if __name__ == '__main__':
     test_tag_pattern()
 
     test_cast()
+    test_read()
     test_get()
     test_tree()
     test_inspect()
@@ -0,0 +1,132 @@
+﻿"""Tests the `pool` module."""
+
+########################################
+# Dependencies                         #
+########################################
+import mph
+from fixtures import logging_disabled
+from fixtures import setup_logging
+from pytest import raises
+from pathlib import Path
+from platform import system
+from numpy import ones
+from threading import Lock
+import os
+
+
+########################################
+# Fixtures                             #
+########################################
+demo = Path(__file__).resolve().parent/'demo.mph'
+pool = None
+
+
+def teardown_module():
+    if pool:
+        pool.shutdown()
+
+
+########################################
+# Jobs                                 #
+########################################
+
+def name(model, suffix=''):
+    return model.name() + suffix
+
+
+def square(x):
+    return x*x
+
+
+def array(model, length):
+    return ones(length)
+
+
+def fail(model):
+    raise ValueError('Job failed on purpose.')
+
+
+def crash(model):
+    os._exit(1)
+
+
+########################################
+# Tests                                #
+########################################
+
+def test_init():
+    global pool
+    pool = mph.Pool(workers=2, cores=1, models=demo)
+    assert len(pool.processes) == 2
+    assert repr(pool) == 'Pool(workers=2)'
+
+
+def test_submit():
+    future = pool.submit(name, '!')
+    assert future.result() == 'demo!'
+    future = pool.submit(name, suffix='?')
+    assert future.result() == 'demo?'
+
+
+def test_map():
+    assert pool.map(name, ['1', '2', '3']) == ['demo1', 'demo2', 'demo3']
+
+
+def test_imap_unordered():
+    results = list(pool.imap_unordered(name, ['1', '2', '3']))
+    assert sorted(results) == ['demo1', 'demo2', 'demo3']
+
+
+def test_share():
+    (small, large) = pool.map(array, [10, 1000000])
+    assert len(small) == 10
+    assert len(large) == 1000000
+    assert (large == 1).all()
+    if mph.pool.shared_memory and system() != 'Windows':
+        (finalizer,) = pool.blocks
+        view = large[::2].T
+        del large
+        assert finalizer.alive
+        assert (view == 1).all()
+        del view
+        assert not finalizer.alive
+
+
+def test_exceptions():
+    with logging_disabled():
+        with raises(ValueError):
+            pool.submit(fail).result()
+        assert pool.map(name, ['4']) == ['demo4']
+        with raises(TypeError):
+            pool.submit(name, Lock()).result()
+        with raises(RuntimeError):
+            pool.submit(crash).result(timeout=60)
+        assert pool.map(name, ['5']) == ['demo5']
+
+
+def test_shutdown():
+    pool.shutdown()
+    assert not any(process.is_alive() for process in pool.processes)
+    with logging_disabled():
+        with raises(RuntimeError):
+            pool.submit(name)
+    with mph.Pool(workers=1) as other:
+        assert other.map(square, [1, 2, 3]) == [1, 4, 9]
+
+
+########################################
+# Main                                 #
+########################################
+
+if __name__ == '__main__':
+    setup_logging()
+    try:
+        test_init()
+        test_submit()
+        test_map()
+        test_imap_unordered()
+        test_share()
+        test_exceptions()
+        test_shutdown()
+    finally:
+        teardown_module()
@@ -39,11 +39,14 @@ def test_repr():
 
 def test_running():
     assert server.running()
+    assert server.reader.is_alive()
+    assert any(mph.server.parse_port(line) for line in server.output)
 
 
 def test_stop():
     server.stop()
     assert not server.running()
+    assert not server.reader.is_alive()
     with logging_disabled():
         server.stop()
 
@@ -69,6 +72,19 @@ def test_parse_port():
     assert mph.server.parse_port(chinese) == 12345
 
 
+def test_parse_event():
+    parse = mph.server.parse_event
+    assert parse('Could not obtain license for COMSOL.') == 'license'
+    assert parse('Out of memory during assembly.') == 'memory'
+    assert parse('Error: Failed to find a solution.') == 'error'
+    assert parse('Warning: Mesh quality is poor.') == 'warning'
+    assert parse('Opened file: demo.mph') is None
+    assert parse('License file: /opt/comsol/license.dat') is None
+    assert parse('Memory: 1234/1500 MB') is None
+    assert parse('java.lang.OutOfMemoryError: Java heap space') == 'memory'
+    assert parse('java.io.IOException: Connection reset') == 'error'
+
+
 ########################################
 # Main                                 #
 ########################################
@@ -81,5 +97,6 @@ if __name__ == '__main__':
         test_running()
         test_stop()
         test_parse_port()
+        test_parse_event()
     finally:
         teardown_module()
@@ -23,6 +23,15 @@ def test_start():
     assert client.cores == 1
 
 
+def test_executor():
+    with logging_disabled(), raises(RuntimeError):
+        mph.submit(print)
+    with logging_disabled(), raises(RuntimeError):
+        mph.option('executor', True)
+        mph.start()
+    mph.option('executor', False)
+
+
 ########################################
 # Main                                 #
 ########################################
@@ -30,3 +39,4 @@ def test_start():
 if __name__ == '__main__':
     setup_logging()
     test_start()
+    test_executor()
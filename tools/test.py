@@ -34,7 +34,7 @@ from os         import environ, pathsep
 
 # Define order of test groups.
 groups = ['meta', 'config', 'discovery', 'server', 'session', 'standalone',
-          'client', 'multi', 'node', 'model', 'exit']
+          'client', 'multi', 'node', 'model', 'pool', 'aio', 'exit']
 
 # Determine path of project root folder.
 here = Path(__file__).resolve().parent